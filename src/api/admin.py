@@ -45,6 +45,8 @@ from src.exceptions.files import (
     StatementNotFoundHTTPException,
 )
 from src.services.admin import AdminService
+from src.utils.cache_manager import get_cache_manager
+from src.decorators.cache.tags import CacheTags
 from src.docs_src.examples.admin import (
     add_genre_example,
     edit_tag_example,
@@ -76,6 +78,7 @@ from src.docs_src.responses.admin import (
 
 
 router = APIRouter(prefix="/admin", tags=["Админ панель ⚜️"])
+cache = get_cache_manager()
 
 
 @router.patch(
@@ -118,6 +121,7 @@ async def add_genre(
 ):
     try:
         genre = await AdminService(db=db).add_genre(data=data)
+        await cache.catalogue.bump(cache.catalogue.GENRES)
     except GenreAlreadyExistsException as ex:
         raise GenreAlreadyExistsHTTPException from ex
     return genre
@@ -135,6 +139,8 @@ async def edit_genre(
 ):
     try:
         await AdminService(db=db).edit_genre(data=data, genre_id=genre_id)
+        await cache.catalogue.bump(cache.catalogue.GENRES)
+        await cache.invalidate(CacheTags.BOOKS)
     except GenreNotFoundException as ex:
         raise GenreNotFoundHTTPException from ex
     except GenreAlreadyExistsException as ex:
@@ -156,6 +162,8 @@ async def delete_genre(
 ):
     try:
         await AdminService(db=db).delete_genre(genre_id=genre_id)
+        await cache.catalogue.bump(cache.catalogue.GENRES)
+        await cache.invalidate(CacheTags.BOOKS)
     except GenreNotFoundException as ex:
         raise GenreNotFoundHTTPException from ex
     except CannotDeleteGenreException as ex:
@@ -175,6 +183,7 @@ async def add_tag(
 ):
     try:
         tag = await AdminService(db=db).add_tag(data=data)
+        await cache.invalidate(CacheTags.BOOKS)
     except TagAlreadyExistsException as ex:
         raise TagAlreadyExistsHTTPException from ex
     except BookNotFoundException as ex:
@@ -193,6 +202,7 @@ async def delete_tag(
 ):
     try:
         await AdminService(db=db).delete_tag(tag_id=tag_id)
+        await cache.invalidate(CacheTags.BOOKS)
     except TagNotFoundException as ex:
         raise TagNotFoundHTTPException from ex
     return {"status": "OK"}
@@ -208,6 +218,7 @@ async def edit_tag(
 ):
     try:
         await AdminService(db=db).edit_tag(tag_id=tag_id, data=data)
+        await cache.invalidate(CacheTags.BOOKS)
     except TagNotFoundException as ex:
         raise TagNotFoundHTTPException from ex
     except TagAlreadyExistsException as ex:
@@ -229,6 +240,7 @@ async def add_reason(
 ):
     try:
         reason = await AdminService(db=db).add_reason(data=data)
+        await cache.catalogue.bump(cache.catalogue.REASONS)
     except ReasonAlreadyExistsException as ex:
         raise ReasonAlreadyExistsHTTPException from ex
     return reason
@@ -246,6 +258,7 @@ async def edit_reason(
 ):
     try:
         await AdminService(db=db).edit_reason(reason_id=reason_id, data=data)
+        await cache.catalogue.bump(cache.catalogue.REASONS)
     except ReasonNotFoundException as ex:
         raise ReasonNotFoundHTTPException from ex
     except ReasonAlreadyExistsException as ex:
@@ -266,6 +279,7 @@ async def delete_reason(
 ):
     try:
         await AdminService(db=db).delete_reason(reason_id=reason_id)
+        await cache.catalogue.bump(cache.catalogue.REASONS)
     except ReasonNotFoundException as ex:
         raise ReasonNotFoundHTTPException from ex
     return {"status": "OK"}
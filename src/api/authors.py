@@ -37,6 +37,7 @@ from src.schemas.books import (
     BookPATCHWithRels,
 )
 from src.utils.cache_manager import get_cache_manager
+from src.decorators.cache.tags import CacheTags
 from src.services.authors import AuthorsService
 from src.docs_src.examples.authors import add_book_example, book_patch_examples
 from src.docs_src.responses.authors import (
@@ -71,6 +72,7 @@ async def add_book(
 ):
     try:
         book = await AuthorsService(db=db).add_book(data=data, user_id=user_id)
+        await cache.invalidate(CacheTags.BOOKS)
     except AuthorNotFoundException as ex:
         raise AuthorNotFoundHTTPException from ex
     except GenreNotFoundException as ex:
@@ -96,6 +98,7 @@ async def edit_book(
         await AuthorsService(db=db).edit_book(
             book_id=book_id, user_id=user_id, user_role=user_role, data=data
         )
+        await cache.invalidate(CacheTags.BOOKS)
     except BookNotFoundException as ex:
         raise BookNotFoundHTTPException from ex
     except GenreNotFoundException as ex:
@@ -125,6 +128,7 @@ async def delete_book(
             book_id=book_id,
             user_id=user_id,
         )
+        await cache.invalidate(CacheTags.BOOKS, CacheTags.book_pages(book_id))
     except BookNotFoundException as ex:
         raise BookNotFoundHTTPException from ex
     except BookNotExistsOrYouNotOwnerException as ex:
@@ -138,7 +142,7 @@ async def delete_book(
     description="Возвращает список книг с подробностями о них",
     responses=get_my_books_responses,
 )
-@cache.base()
+@cache.base(ttl=600, tags=[CacheTags.BOOKS, CacheTags.BOOK_LISTINGS])
 async def get_my_books(
     db: DBDep,
     author_id: UserIdDep,
@@ -170,6 +174,7 @@ async def add_cover(
             user_id=user_id,
             file=file,
         )
+        await cache.invalidate(CacheTags.BOOKS)
     except WrongFileExpensionException as ex:
         raise WrongFileExpensionHTTPException from ex
     except WrongCoverResolutionException as ex:
@@ -202,6 +207,7 @@ async def put_cover(
             user_id=user_id,
             file=file,
         )
+        await cache.invalidate(CacheTags.BOOKS)
     except WrongFileExpensionException as ex:
         raise WrongFileExpensionHTTPException from ex
     except WrongCoverResolutionException as ex:
@@ -269,6 +275,8 @@ async def edit_content(
             book_id=book_id,
             file=file,
         )
+        # Кеш изменившихся страниц сбрасывает render_book
+        await cache.invalidate(CacheTags.BOOKS)
     except WrongFileExpensionException as ex:
         raise WrongFileExpensionHTTPException from ex
     except ContentNotFoundException as ex:
@@ -298,6 +306,7 @@ async def publicate_book(
             user_id=user_id,
             should_check_owner=should_check_owner,
         )
+        await cache.invalidate(CacheTags.BOOKS)
     except BookNotFoundException as ex:
         raise BookNotFoundHTTPException from ex
     except ContentNotFoundException as ex:
@@ -312,7 +321,8 @@ async def publicate_book(
 @router.get(
     path="/{book_id}/publication_status",
     summary="Посмотреть статус публикации книги",
-    description="Статусы публикации: uploaded, rendering, ready, failed",
+    description="Статусы публикации: uploaded, rendering, ready, failed. "
+    "rendered_pages - сколько страниц уже отрендерено",
     responses=get_publication_status_responses,
 )
 async def get_status_publicate_book(
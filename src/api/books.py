@@ -1,14 +1,25 @@
-from fastapi import APIRouter, Body, Path
-from src.api.dependencies import PaginationDep, DBDep, S3Dep, UserIdDep, SearchDep
+from fastapi import APIRouter, Body, Path, Query, Request
+from src.api.dependencies import (
+    CursorPaginationDep,
+    PaginationDep,
+    DBDep,
+    S3Dep,
+    UserIdDep,
+    SearchDep,
+)
 from src.exceptions.books import (
     BookNotFoundHTTPException,
     BookNotFoundException,
     ContentNotFoundException,
     ContentNotFoundHTTPException,
+    PageIsRenderingException,
+    PageIsRenderingHTTPException,
     PageNotFoundException,
     PageNotFoundHTTPException,
 )
 from src.exceptions.search import (
+    InvalidCursorException,
+    InvalidCursorHTTPException,
     LaterThanAfterEarlierThanException,
     LaterThanAfterEarlierThanHTTPException,
     MinAgeGreaterThanMaxAgeException,
@@ -21,12 +32,15 @@ from src.exceptions.search import (
 from src.exceptions.reports import ReasonNotFoundException, ReasonNotFoundHTTPException
 from src.schemas.reports import ReportAddFromUser
 from src.utils.cache_manager import get_cache_manager
+from src.decorators.cache.tags import CacheTags
 from src.services.books import BooksService
 from src.docs_src.examples.books import report_book_example
 from src.docs_src.responses.books import (
     download_book_responses,
     get_all_genres_responses,
+    get_all_reasons_responses,
     get_book_by_id_responses,
+    get_filtered_publicated_books_with_cursor_responses,
     get_filtered_publicated_books_with_pagination_responses,
     get_page_responses,
     report_book_responses,
@@ -40,9 +54,18 @@ cache = get_cache_manager()
 @router.get(
     path="",
     summary="Получить список книг по фильтрам",
+    description="q - полнотекстовый поиск по названию, описанию и тегам, "
+    "устойчивый к опечаткам в названии. С q книги сортируются по релевантности",
     responses=get_filtered_publicated_books_with_pagination_responses,
 )
-@cache.base(ttl=15)
+@cache.base(
+    ttl=600,
+    local=True,
+    lock=True,
+    raw_response=True,
+    tags=[CacheTags.BOOKS, CacheTags.BOOK_LISTINGS],
+    own_db_session=True,  # горячий список: промах ждет много запросов
+)
 async def get_filtered_publicated_books_with_pagination(
     db: DBDep,
     s3: S3Dep,
@@ -68,17 +91,80 @@ async def get_filtered_publicated_books_with_pagination(
 
 
 @router.get(
-    path="/genres", summary="Список всех жанров", responses=get_all_genres_responses
+    path="/cursor",
+    summary="Получить список книг по фильтрам (keyset-пагинация)",
+    description="Фильтры те же, что и у GET /books. Вместо номера страницы "
+    "передается next_cursor из предыдущего ответа. Сортировка: book_id, rating, "
+    "readers. При сортировке по book_id глубокие страницы отдаются так же быстро, "
+    "как первая; rating и readers вычисляются, поэтому отфильтрованные книги "
+    "сортируются заново на каждой странице",
+    responses=get_filtered_publicated_books_with_cursor_responses,
 )
-async def get_all_genres(db: DBDep):
+@cache.base(
+    ttl=600,
+    local=True,
+    lock=True,
+    raw_response=True,
+    tags=[CacheTags.BOOKS, CacheTags.BOOK_LISTINGS],
+    own_db_session=True,  # горячий список: промах ждет много запросов
+)
+async def get_filtered_publicated_books_with_cursor(
+    db: DBDep,
+    s3: S3Dep,
+    pagination_data: CursorPaginationDep,
+    search_data: SearchDep,
+):
+    try:
+        return await BooksService(
+            db=db, s3=s3
+        ).get_filtered_publicated_books_with_cursor(
+            pagination_data=pagination_data,
+            search_data=search_data,
+        )
+    except InvalidCursorException as ex:
+        raise InvalidCursorHTTPException from ex
+    except LaterThanAfterEarlierThanException as ex:
+        raise LaterThanAfterEarlierThanHTTPException from ex
+    except MinAgeGreaterThanMaxAgeException as ex:
+        raise MinAgeGreaterThanMaxAgeHTTPException from ex
+    except MinRatingGreaterThanMaxRatingException as ex:
+        raise MinRatingGreaterThanMaxRatingHTTPException from ex
+    except MinReadersGreaterThanMaxReadersException as ex:
+        raise MinReadersGreaterThanMaxReadersHTTPException from ex
+
+
+@router.get(
+    path="/genres",
+    summary="Список всех жанров",
+    description="Ответ содержит ETag. Если передать его в If-None-Match, "
+    "а список не менялся - вернется 304 без тела",
+    responses=get_all_genres_responses,
+)
+@cache.catalogue.snapshot(cache.catalogue.GENRES)
+async def get_all_genres(request: Request, db: DBDep):
     return await BooksService(db=db).get_all_genres()
 
 
+@router.get(
+    path="/reasons",
+    summary="Список причин для жалоб",
+    description="Ответ содержит ETag. Если передать его в If-None-Match, "
+    "а список не менялся - вернется 304 без тела",
+    responses=get_all_reasons_responses,
+)
+@cache.catalogue.snapshot(cache.catalogue.REASONS)
+async def get_all_reasons(request: Request, db: DBDep):
+    return await BooksService(db=db).get_all_reasons()
+
+
 @router.get(
     path="/{book_id}",
     summary="Получить книгу по её id",
     responses=get_book_by_id_responses,
 )
+@cache.base(
+    ttl=600, raw_response=True, tags=[CacheTags.BOOKS, CacheTags.book("{book_id}")]
+)
 async def get_book_by_id(
     db: DBDep,
     book_id: int = Path(le=2**31),
@@ -114,16 +200,23 @@ async def download_book(
     path="/{book_id}/page/{page_number}",
     summary="Получить страницу книги",
     description="Возвращает массив из элементов с подробной информацией о каждой строчке в книге. "
-    "Если встречаются изображения - возвращает URL доступа на их скачивание",
+    "Если встречаются изображения - возвращает URL доступа на их скачивание. "
+    "С compact=true возвращает компактный формат (версия 2): таблицу стилей строк, "
+    "столбцы текста и координат и отдельный список изображений. "
+    "Пока книга дорендеривается, для еще не готовой страницы возвращается 503 "
+    "с заголовком Retry-After, а сама страница рендерится вне очереди",
     responses=get_page_responses,
 )
-@cache.books.page(ttl=300)
+@cache.books.page(local=True)
 async def get_page(
     s3: S3Dep,
     db: DBDep,
     user_id: UserIdDep,
     page_number: int = Path(le=5000),
     book_id: int = Path(le=2**31),
+    compact: bool = Query(
+        default=False, description="Вернуть страницу в компактном формате"
+    ),
 ):
     try:
         page = await BooksService(db=db, s3=s3).get_page(
@@ -137,6 +230,8 @@ async def get_page(
         raise ContentNotFoundHTTPException from ex
     except PageNotFoundException as ex:
         raise PageNotFoundHTTPException(page_number=page_number) from ex
+    except PageIsRenderingException as ex:
+        raise PageIsRenderingHTTPException from ex
     return page
 
 
@@ -15,9 +15,10 @@ from src.exceptions.auth import (
     NotAuthentificatedHTTPException,
     ExpireTokenHTTPException,
 )
-from src.utils.s3_manager import AsyncS3Client, SyncS3Client
+from src.utils.s3_manager import AsyncS3Client, AsyncS3ClientPool, SyncS3Client
 from src.config import settings
 from src.enums.users import AllUsersRolesEnum
+from src.enums.books import BooksOrderBy
 from src.connectors.redis_connector import redis_conn
 from src.utils.cache_manager import CacheManager
 from functools import lru_cache
@@ -28,6 +29,7 @@ import redis.asyncio as redis
 
 
 class BookSearch(BaseModel):
+    q: Annotated[str | None, Query(default=None, min_length=2, max_length=100)] = None
     book_title: Annotated[str | None, Query(default=None)] = None
     max_age: Annotated[int | None, Query(default=None, ge=0, le=21)] = None
     min_age: Annotated[int | None, Query(default=None, ge=0, le=21)] = None
@@ -49,6 +51,25 @@ class PaginationParams(BaseModel):
 
 PaginationDep = Annotated[PaginationParams, Depends()]
 
+
+class CursorPaginationParams(BaseModel):
+    cursor: Annotated[str | None, Query(default=None)] = None
+    per_page: Annotated[int | None, Query(default=5, ge=1, lt=40)] = 5
+    order_by: Annotated[BooksOrderBy, Query(default=BooksOrderBy.BOOK_ID)] = (
+        BooksOrderBy.BOOK_ID
+    )
+
+
+CursorPaginationDep = Annotated[CursorPaginationParams, Depends()]
+
+
+class ReviewsPaginationParams(BaseModel):
+    cursor: Annotated[str | None, Query(default=None)] = None
+    limit: Annotated[int | None, Query(default=10, ge=1, le=50)] = 10
+
+
+ReviewsPaginationDep = Annotated[ReviewsPaginationParams, Depends()]
+
 # --- Schemas ---
 
 
@@ -133,6 +154,7 @@ def get_sync_s3client():
         secret_key=settings.S3_SECRET_KEY,
         endpoint_url=settings.S3_URL,
         region_name=settings.S3_REGION,
+        max_pool_connections=settings.RENDER_UPLOAD_CONCURRENCY,
     )
 
 
@@ -177,12 +199,17 @@ def get_async_s3client():
         secret_key=settings.S3_SECRET_KEY,
         endpoint_url=settings.S3_URL,
         region_name=settings.S3_REGION,
+        max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+        keepalive_timeout=settings.S3_KEEPALIVE_TIMEOUT,
     )
 
 
+# Общий клиент для всех запросов (открывается в lifespan приложения)
+s3_pool = AsyncS3ClientPool(get_async_s3client())
+
+
 async def get_async_session():
-    async with get_async_s3client() as client:
-        yield client
+    return await s3_pool.get()
 
 
 S3Dep = Annotated[AsyncS3Client, Depends(get_async_session)]
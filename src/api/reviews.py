@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Body, Path
 from src.services.reviews import ReviewsService
-from src.api.dependencies import DBDep, UserIdDep, UserRoleDep
+from src.utils.cache_manager import get_cache_manager
+from src.decorators.cache.tags import CacheTags
+from src.api.dependencies import DBDep, ReviewsPaginationDep, UserIdDep, UserRoleDep
 from src.schemas.reviews import ReviewAddFromUser, ReviewPut
 from src.exceptions.reviews import (
     CannotDeleteOthersReviewException,
@@ -15,6 +17,7 @@ from src.exceptions.reviews import (
     CannotDeleteOthersReviewHTTPException,
 )
 from src.exceptions.books import BookNotFoundException, BookNotFoundHTTPException
+from src.exceptions.search import InvalidCursorException, InvalidCursorHTTPException
 from src.docs_src.examples.reviews import add_review_example
 from src.docs_src.responses.reviews import (
     delete_review_responses,
@@ -25,6 +28,7 @@ from src.docs_src.responses.reviews import (
 )
 
 router = APIRouter(prefix="/reviews", tags=["Отзывы на книги 🌟"])
+cache = get_cache_manager()
 
 
 @router.post(
@@ -45,6 +49,8 @@ async def add_review(
         review = await ReviewsService(db=db).add_review(
             data=data, user_id=user_id, user_role=user_role, book_id=book_id
         )
+        # отзыв меняет рейтинг только этой книги и списков с рейтингом
+        await cache.invalidate(CacheTags.book(book_id), CacheTags.BOOK_LISTINGS)
     except BookNotFoundException as ex:
         raise BookNotFoundHTTPException from ex
     except ReviewAtThisBookAlreadyExistsException as ex:
@@ -69,12 +75,13 @@ async def edit_review(
     review_id: int = Path(le=2**31),
 ):
     try:
-        await ReviewsService(db=db).edit_review(
+        book_id = await ReviewsService(db=db).edit_review(
             user_id=user_id,
             user_role=user_role,
             review_id=review_id,
             data=data,
         )
+        await cache.invalidate(CacheTags.book(book_id), CacheTags.BOOK_LISTINGS)
     except ReviewNotFoundException as ex:
         raise ReviewNotFoundHTTPException from ex
     except CannotEditOthersReviewException as ex:
@@ -96,11 +103,12 @@ async def delete_review(
     review_id: int = Path(le=2**31),
 ):
     try:
-        await ReviewsService(db=db).delete_review(
+        book_id = await ReviewsService(db=db).delete_review(
             user_id=user_id,
             user_role=user_role,
             review_id=review_id,
         )
+        await cache.invalidate(CacheTags.book(book_id), CacheTags.BOOK_LISTINGS)
     except ReviewNotFoundException as ex:
         raise ReviewNotFoundHTTPException from ex
     except CannotDeleteOthersReviewException as ex:
@@ -122,11 +130,19 @@ async def get_my_reviews(
 
 @router.get(
     path="/by_book/{book_id}",
-    summary="Получить все отзывы на книгу",
+    summary="Получить отзывы на книгу",
+    description="Отзывы отдаются страницами от новых к старым. "
+    "Для следующей страницы передайте next_cursor из предыдущего ответа",
     responses=get_book_reviews_responses,
 )
 async def get_book_reviews(
     db: DBDep,
+    pagination_data: ReviewsPaginationDep,
     book_id: int = Path(le=2**31),
 ):
-    return await ReviewsService(db=db).get_book_reviews(book_id=book_id)
+    try:
+        return await ReviewsService(db=db).get_book_reviews(
+            book_id=book_id, pagination_data=pagination_data
+        )
+    except InvalidCursorException as ex:
+        raise InvalidCursorHTTPException from ex
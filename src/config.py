@@ -34,6 +34,30 @@ class Settings(BaseSettings):
     S3_DOMAIN: str
     S3_ACCESS_KEY: str
     S3_SECRET_KEY: str
+    S3_MAX_POOL_CONNECTIONS: int = 50
+    S3_KEEPALIVE_TIMEOUT: int = 60  # секунд
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024  # не меньше 5 МиБ
+    S3_MULTIPART_CONCURRENCY: int = 4
+    S3_DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024
+
+    # Рендеринг книг в Celery
+    RENDER_WORKERS: int = 4  # процессов, разбирающих PDF
+    RENDER_PAGES_PER_CHUNK: int = 25
+    RENDER_PRIORITY_PAGES: int = 10  # после них книгу уже можно читать
+    RENDER_UPLOAD_CONCURRENCY: int = 16
+    RENDER_MAX_RETRIES: int = 3  # повтор продолжает рендеринг с чекпоинта
+    RENDER_IMAGE_WIDTHS: list[int] = [320, 640, 1280]  # варианты изображений (WebP)
+    RENDER_IMAGE_QUALITY: int = 80
+    RENDER_COPY_CHUNK_SIZE: int = 500  # строк страниц в одном COPY
+
+    # Локальный кеш в памяти процесса (перед Redis)
+    LOCAL_CACHE_MAX_ENTRIES: int = 1000
+    LOCAL_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LOCAL_CACHE_TTL: int = 60
+
+    # Отложенная запись прогресса чтения
+    PROGRESS_FLUSH_INTERVAL_MS: int = 1000
+    PROGRESS_FLUSH_MAX_ENTRIES: int = 500
 
     # Аналитика
     STATEMENT_DIR_PATH: str = "/src/analytics/data"  #  !!! БЕЗ СЛЕША В НАЧАЛЕ !!!
@@ -0,0 +1,4 @@
+class CacheVersion:
+    # Увеличить при изменении схем, которые попадают в кеш:
+    # старые значения перестанут читаться и истекут сами
+    SCHEMA_VERSION = 3
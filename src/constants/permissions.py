@@ -11,7 +11,9 @@ class Permissions:
     PUBLIC_ENDPOINTS = {
         (r"^/auth/\d+$", "GET"),
         (r"^/books$", "GET"),
+        (r"^/books/cursor$", "GET"),
         (r"^/books/genres$", "GET"),
+        (r"^/books/reasons$", "GET"),
         (r"^/books/\d+$", "GET"),
         (r"^/books/download/\d+$", "GET"),
         (r"^/reviews/by_book/\d+$", "GET"),
@@ -1,4 +1,7 @@
 from functools import wraps
+from fastapi import Response
+from src.context.database import get_db_as_context_manager
+from src.decorators.cache.local import local_cache
 from src.decorators.cache.utils import make_cache_key, cache_by_key
 
 
@@ -10,6 +13,11 @@ class BaseCacheManager:
         self,
         prefix_key: str = "cache",
         ttl: int = 60,
+        local: bool = False,
+        lock: bool = False,
+        raw_response: bool = False,
+        tags: list[str] | None = None,
+        own_db_session: bool = False,
     ):
         """
         Декоратор для кэширования асинхронных функций с помощью Redis.
@@ -21,15 +29,38 @@ class BaseCacheManager:
 
         Ключ кэша формируется из имени функции и аргументов,
         имеющих тип один из: (int, str, float, bool, date)
+
+        local=True - горячие ключи дополнительно хранятся в памяти процесса
+        lock=True - при истечении ключа его пересчитывает только один процесс
+        raw_response=True (для ручек FastAPI) - закешированный JSON отдается
+        в ответ как есть, без десериализации и повторной валидации
+        tags - теги записи, в них можно подставлять аргументы функции:
+        tags=[CacheTags.BOOKS, "user:{user_id}"]
+        own_db_session=True - значение вычисляется в своей сессии базы, а не
+        в сессии первого запроса: отмена этого запроса не роняет остальных,
+        кто ждет то же значение (см. db_factory в cache_by_key)
         """
 
         def wrapper(func):
             @wraps(func)
             async def inner(*args, **kwargs):
                 key = make_cache_key(prefix_key, func.__name__, args, kwargs)
-                return await cache_by_key(
-                    redis=self.redis, key=key, ttl=ttl, func=func, *args, **kwargs
+                res = await cache_by_key(
+                    redis=self.redis,
+                    key=key,
+                    ttl=ttl,
+                    func=func,
+                    local=local_cache if local else None,
+                    lock=lock,
+                    raw=raw_response,
+                    tags=[tag.format(**kwargs) for tag in tags or []],
+                    db_factory=get_db_as_context_manager if own_db_session else None,
+                    *args,
+                    **kwargs,
                 )
+                if raw_response:
+                    return Response(content=res, media_type="application/json")
+                return res
 
             return inner
 
@@ -1,7 +1,13 @@
 from functools import wraps
-from src.schemas.user_reads import UserBookReadAdd, UserBookReadEdit
+from src.decorators.cache.local import local_cache
+from src.decorators.cache.tags import CacheTags
 from src.decorators.cache.utils import cache_by_key
-from src.context.database import get_db_as_context_manager
+from src.utils.page_content import PageContentCodec
+from src.utils.progress_buffer import progress_buffer
+
+
+def page_content_key(book_id: int, page_number: int) -> str:
+    return f"page_content:book_id={book_id}:page_number={page_number}"
 
 
 class BooksCacheManager:
@@ -10,38 +16,56 @@ class BooksCacheManager:
 
     def page(
         self,
-        ttl: int = 60,
+        ttl: int = 60 * 60 * 6,
+        url_expires_in: int = 60 * 60 * 24,
+        local: bool = False,
+        lock: bool = False,
     ):
+        """
+        Кеширует контент страницы без подписанных ссылок.
+
+        Контент страницы не меняется, пока автор не загрузит новый файл
+        (тогда записи изменившихся страниц сбрасываются по тегу
+        CacheTags.book_page, а всей книги - по CacheTags.book_pages),
+        поэтому хранится долго и общий для всех пользователей.
+        Ссылки на изображения подписываются заново при каждом запросе
+        (подпись считается локально, без обращения к S3).
+        В кеше контент хранится в компактном формате, развернутый список
+        элементов отдается, если эндпоинт вызван без compact=True.
+        local=True - контент дополнительно хранится в памяти процесса,
+        lock=True - при истечении ключа его пересчитывает только один процесс
+        """
+
         def wrapper(func):
             @wraps(func)
             async def inner(*args, **kwargs):
                 book_id = kwargs.get("book_id")
                 page_number = kwargs.get("page_number")
                 user_id = kwargs.get("user_id")
-                key = f"page:book_id={book_id}:page_number={page_number}"
+                s3 = kwargs.get("s3")
+                compact = kwargs.get("compact", False)
+                key = page_content_key(book_id=book_id, page_number=page_number)
                 page = await cache_by_key(
-                    redis=self.redis, key=key, ttl=ttl, func=func, *args, **kwargs
+                    redis=self.redis,
+                    key=key,
+                    ttl=ttl,
+                    func=func,
+                    local=local_cache if local else None,
+                    lock=lock,
+                    tags=[
+                        CacheTags.book_pages(book_id),
+                        CacheTags.book_page(book_id, page_number),
+                    ],
+                    *args,
+                    **kwargs,
+                )
+                # Прогресс пишется только здесь (и при чтении из кеша, и при
+                # промахе) и уходит в базу пачками
+                progress_buffer.add(
+                    user_id=user_id, book_id=book_id, page_number=page_number
                 )
-                async with get_db_as_context_manager() as db:
-                    user_read_book = await db.user_reads.get_filtered(
-                        user_id=user_id, book_id=book_id
-                    )
-                    if not user_read_book:
-                        await db.user_reads.add(
-                            UserBookReadAdd(
-                                book_id=book_id,
-                                user_id=user_id,
-                                last_seen_page=page_number,
-                            )
-                        )
-                    else:
-                        await db.user_reads.edit(
-                            UserBookReadEdit(last_seen_page=page_number),
-                            user_id=user_id,
-                            book_id=book_id,
-                        )
-                    await db.commit()
-                return page
+                page = await s3.books.sign_page_content(page, expires_in=url_expires_in)
+                return page if compact else PageContentCodec.decode(page)
 
             return inner
 
@@ -0,0 +1,77 @@
+import hashlib
+from functools import wraps
+from fastapi import Request, Response
+from src.decorators.cache.local import local_cache
+from src.decorators.cache.utils import cache_by_key
+
+
+class CatalogueCacheManager:
+    """
+    Кеш справочников: жанры, причины жалоб.
+
+    Справочник хранится целиком как снимок под номером версии
+    (в Redis и в памяти процесса). Изменение справочника увеличивает
+    версию - bump(), старые снимки истекают сами.
+    Ответ отдается с ETag: клиент с актуальной копией получает 304
+    """
+
+    GENRES = "genres"
+    REASONS = "reasons"
+
+    def __init__(self, redis):
+        self.redis = redis._redis
+
+    @staticmethod
+    def _tag(name: str) -> str:
+        return f"catalogue:{name}"
+
+    @staticmethod
+    def _version_key(name: str) -> str:
+        return f"catalogue:{name}:version"
+
+    async def _get_version(self, name: str) -> int:
+        found, version = local_cache.get(self._version_key(name))
+        if not found:
+            version = int(await self.redis.get(self._version_key(name)) or 0)
+            local_cache.set(
+                self._version_key(name),
+                version,
+                size=0,
+                ttl=local_cache.ttl,
+                tags=[self._tag(name)],
+            )
+        return version
+
+    def snapshot(self, name: str, ttl: int = 60 * 60 * 24):
+        def wrapper(func):
+            @wraps(func)
+            async def inner(*args, **kwargs):
+                request: Request = kwargs.get("request")
+                version = await self._get_version(name)
+                body = await cache_by_key(
+                    redis=self.redis,
+                    key=f"catalogue:{name}:v{version}",
+                    ttl=ttl,
+                    func=func,
+                    local=local_cache,
+                    raw=True,
+                    tags=[self._tag(name)],
+                    *args,
+                    **kwargs,
+                )
+                etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+                headers = {"ETag": etag, "Cache-Control": "no-cache"}
+                if request.headers.get("if-none-match") == etag:
+                    return Response(status_code=304, headers=headers)
+                return Response(
+                    content=body, media_type="application/json", headers=headers
+                )
+
+            return inner
+
+        return wrapper
+
+    async def bump(self, name: str):
+        """Новая версия справочника во всех процессах"""
+        await self.redis.incr(self._version_key(name))
+        await local_cache.invalidate(self.redis, [self._tag(name)])
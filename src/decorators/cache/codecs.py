@@ -0,0 +1,80 @@
+import zlib
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+
+
+def _default(obj):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError
+
+
+class CacheCodec:
+    """
+    Кодек значений кеша.
+
+    name попадает в ключ кеша, поэтому смена кодека не ломает
+    уже записанные значения - они просто не будут прочитаны
+    """
+
+    name: str
+
+    def encode(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+    def to_json(self, data: bytes) -> bytes:
+        """Готовый JSON для ответа - без десериализации и валидации"""
+        raise NotImplementedError
+
+
+class OrjsonCodec(CacheCodec):
+    """JSON через orjson. Pydantic-модели сохраняются через model_dump"""
+
+    name = "json"
+
+    def encode(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=_default)
+
+    def decode(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+    def to_json(self, data: bytes) -> bytes:
+        return data
+
+
+class CompressedCodec(CacheCodec):
+    """Сжимает значения больше min_size (первый байт - признак сжатия)"""
+
+    RAW = b"\x00"
+    COMPRESSED = b"\x01"
+
+    def __init__(self, codec: CacheCodec, min_size: int = 4096, level: int = 1):
+        self.codec = codec
+        self.min_size = min_size
+        self.level = level
+        self.name = f"{codec.name}+zlib"
+
+    def encode(self, value: Any) -> bytes:
+        data = self.codec.encode(value)
+        if len(data) < self.min_size:
+            return self.RAW + data
+        return self.COMPRESSED + zlib.compress(data, self.level)
+
+    def _unpack(self, data: bytes) -> bytes:
+        if data[:1] == self.COMPRESSED:
+            return zlib.decompress(data[1:])
+        return data[1:]
+
+    def decode(self, data: bytes) -> Any:
+        return self.codec.decode(self._unpack(data))
+
+    def to_json(self, data: bytes) -> bytes:
+        return self.codec.to_json(self._unpack(data))
+
+
+default_codec = CompressedCodec(OrjsonCodec())
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Iterable
+
+import orjson
+
+from src.config import settings
+
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+
+class LocalCache:
+    """
+    Локальный (в памяти процесса) LRU-кеш с TTL перед Redis.
+
+    Ограничен и по количеству записей, и по суммарному размеру
+    (размер записи - длина ее сериализованного значения в Redis).
+    Между воркерами uvicorn сбрасывается через Redis pub/sub:
+    invalidate() удаляет записи с нужными тегами во всех процессах
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, int, Any, tuple[str, ...]]] = (
+            OrderedDict()
+        )
+        self._tag_keys: dict[str, set[str]] = {}
+        self._size = 0
+        self._listener: asyncio.Task | None = None
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """Возвращает (найдено ли значение, значение)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, _, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._pop(key)
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(
+        self, key: str, value: Any, size: int, ttl: int, tags: Iterable[str] = ()
+    ) -> None:
+        if size > self.max_bytes:
+            return
+        self._pop(key)
+        expires_at = time.monotonic() + min(ttl, self.ttl)
+        tags = tuple(tags)
+        self._entries[key] = (expires_at, size, value, tags)
+        for tag in tags:
+            self._tag_keys.setdefault(tag, set()).add(key)
+        self._size += size
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            self._pop(next(iter(self._entries)))
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            for key in self._tag_keys.pop(tag, set()):
+                self._pop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tag_keys.clear()
+        self._size = 0
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        _, size, _, tags = entry
+        self._size -= size
+        for tag in tags:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+    async def invalidate(self, redis, tags: Iterable[str]) -> None:
+        """Сбрасывает записи с тегами во всех процессах"""
+        tags = tuple(tags)
+        self.invalidate_tags(tags)
+        await redis.publish(INVALIDATION_CHANNEL, orjson.dumps(tags))
+
+    async def _listen(self, redis) -> None:
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.invalidate_tags(orjson.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                # Пока нет подписки, сообщения теряются - сбрасываем кеш целиком
+                logging.exception(ex)
+                self.clear()
+                await asyncio.sleep(1)
+
+    def start(self, redis) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(redis))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+local_cache = LocalCache(
+    max_entries=settings.LOCAL_CACHE_MAX_ENTRIES,
+    max_bytes=settings.LOCAL_CACHE_MAX_BYTES,
+    ttl=settings.LOCAL_CACHE_TTL,
+)
@@ -0,0 +1,51 @@
+import orjson
+
+from src.decorators.cache.local import INVALIDATION_CHANNEL, local_cache
+
+
+# Сет ключей тега живет дольше любой записи кеша
+TAG_TTL = 60 * 60 * 24
+
+
+class CacheTags:
+    """
+    Теги, которыми помечаются записи кеша.
+    Изменение данных сбрасывает все записи с нужным тегом
+    """
+
+    BOOKS = "books"  # списки книг, карточки книг, книги автора
+    # списки, в которых есть рейтинг и отзывы (меняются вместе с отзывами)
+    BOOK_LISTINGS = "book_listings"
+
+    @staticmethod
+    def book(book_id: int | str) -> str:
+        """Карточка книги. В декораторе можно передать шаблон: book("{book_id}")"""
+        return f"book:{book_id}"
+
+    @staticmethod
+    def book_pages(book_id: int) -> str:
+        return f"book_pages:{book_id}"
+
+    @staticmethod
+    def book_page(book_id: int, page_number: int) -> str:
+        return f"book_page:{book_id}:{page_number}"
+
+
+def tag_key(tag: str) -> str:
+    return f"cache_tag:{tag}"
+
+
+async def invalidate_tags(redis, *tags: str):
+    """Удаляет из Redis и локальных кешей всех процессов записи с тегами"""
+    for tag in tags:
+        keys = await redis.smembers(tag_key(tag))
+        await redis.delete(tag_key(tag), *keys)
+    await local_cache.invalidate(redis, tags)
+
+
+def invalidate_tags_sync(redis, *tags: str):
+    """То же самое для синхронного клиента (Celery)"""
+    for tag in tags:
+        keys = redis.smembers(tag_key(tag))
+        redis.delete(tag_key(tag), *keys)
+    redis.publish(INVALIDATION_CHANNEL, orjson.dumps(tags))
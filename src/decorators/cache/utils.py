@@ -1,6 +1,60 @@
+import asyncio
+from contextlib import nullcontext
 from datetime import date, timedelta
-import pickle
-from typing import Callable
+import math
+import random
+import secrets
+import struct
+import time
+from typing import Awaitable, Callable, NamedTuple
+from pydantic import BaseModel
+from src.constants.cache import CacheVersion
+from src.decorators.cache.codecs import CacheCodec, default_codec
+from src.decorators.cache.local import LocalCache
+from src.decorators.cache.tags import TAG_TTL, tag_key
+
+
+# Вычисления, которые сейчас идут в этом процессе (single-flight)
+_in_flight: dict[str, asyncio.Task] = {}
+
+# Чем больше, тем раньше начинается досрочное обновление (XFetch)
+EARLY_REFRESH_BETA = 1.0
+LOCK_TIMEOUT = 10  # секунд
+LOCK_POLL_INTERVAL = 0.05  # секунд
+
+# Снимает блокировку, только если она все еще наша: вычисление могло
+# пережить LOCK_TIMEOUT, и блокировку уже взял другой процесс
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class CachedValue(NamedTuple):
+    """То, что хранится в Redis: значение и данные для досрочного обновления"""
+
+    data: bytes  # значение, закодированное кодеком
+    delta: float  # сколько секунд вычислялось значение
+    expires_at: float  # unix-время истечения ключа
+
+
+_HEADER = struct.Struct("!dd")
+
+
+def dump_cached(cached: CachedValue) -> bytes:
+    return _HEADER.pack(cached.delta, cached.expires_at) + cached.data
+
+
+def load_cached(payload: bytes) -> CachedValue:
+    delta, expires_at = _HEADER.unpack_from(payload)
+    return CachedValue(data=payload[_HEADER.size :], delta=delta, expires_at=expires_at)
+
+
+def versioned_key(key: str, codec: CacheCodec = default_codec) -> str:
+    """Версия схем и кодек в ключе: после их смены старые значения не читаются"""
+    return f"v{CacheVersion.SCHEMA_VERSION}:{codec.name}:{key}"
 
 
 def make_cache_key(prefix: str, func_name: str, args, kwargs):
@@ -11,20 +65,148 @@ def make_cache_key(prefix: str, func_name: str, args, kwargs):
     for k, v in kwargs.items():
         if isinstance(v, (int, str, float, bool, date)) or v is None:
             clean_args.append(f"{k}={v}")
+        elif isinstance(v, BaseModel):
+            # Параметры запроса (фильтры, пагинация) тоже должны попадать в ключ
+            clean_args.append(f"{k}={v.model_dump_json()}")
     return f"{prefix}:{func_name}:{':'.join(clean_args)}"
 
 
-async def cache_by_key(redis, key: str, ttl: int, func: Callable, *args, **kwargs):
+def should_refresh_early(delta: float, expires_at: float) -> bool:
+    """
+    Вероятностное досрочное обновление (XFetch).
+    Чем ближе истечение ключа и чем дольше он вычисляется,
+    тем выше шанс, что текущий запрос обновит его заранее
+    """
+    return (
+        time.time() - delta * EARLY_REFRESH_BETA * math.log(1 - random.random())
+        >= expires_at
+    )
+
+
+async def _single_flight(key: str, compute: Callable[[], Awaitable]):
+    """Одно вычисление на ключ в процессе, остальные ждут его результат"""
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(compute())
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    # shield - отмена одного запроса не должна отменять вычисление для всех
+    return await asyncio.shield(task)
+
+
+async def _compute_with_lock(redis, key: str, compute, stale, present):
+    """
+    Межпроцессная блокировка в Redis: считает только ее владелец.
+    Остальные отдают устаревшее значение, а если его нет - ждут нового
+    """
+    lock_key = f"lock:{key}"
+    token = secrets.token_hex(16)
+    if await redis.set(lock_key, token, nx=True, px=LOCK_TIMEOUT * 1000):
+        try:
+            return await compute()
+        finally:
+            await redis.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+    if stale is not None:
+        return stale
+    for _ in range(int(LOCK_TIMEOUT / LOCK_POLL_INTERVAL)):
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        cached = await redis.get(key)
+        if cached:
+            return present(load_cached(cached).data), len(cached)
+    return await compute()
+
+
+async def cache_by_key(
+    redis,
+    key: str,
+    ttl: int,
+    func: Callable,
+    *args,
+    local: LocalCache | None = None,
+    lock: bool = False,
+    raw: bool = False,
+    codec: CacheCodec = default_codec,
+    tags: list[str] | None = None,
+    db_factory: Callable | None = None,
+    **kwargs,
+):
     """
     Содержит в себе основную логику кеша.
 
     Вызывается везде одинаково:
     return await cache_by_key(redis=self.redis, key=key, ttl=ttl, func=func, *args, **kwargs)
+
+    Значения кодируются codec (по умолчанию JSON через orjson со сжатием).
+    raw=True - возвращаются готовые JSON-байты, которые можно сразу
+    отдать в ответ, иначе - декодированное значение (dict/list).
+
+    Если передан local - сначала проверяется локальный кеш процесса,
+    и только потом Redis.
+
+    tags - теги записи, по которым ее сбрасывает invalidate_tags()
+
+    db_factory - вычисление общее для всех ждущих запросов, и с ним func
+    получает свою сессию базы (kwarg db) вместо сессии первого запроса,
+    которую могут закрыть раньше, чем вычисление закончится. Цена - второе
+    соединение из пула на промах и обход app.dependency_overrides, поэтому
+    по умолчанию используется сессия запроса
+
+    Защита от лавины запросов при истечении ключа:
+    - в процессе значение вычисляет только один запрос, остальные ждут его
+    - ключ обновляется досрочно с вероятностью, растущей к концу TTL,
+      пока идет обновление - отдается текущее значение
+    - lock=True - дополнительно блокировка в Redis между процессами
     """
+    key = versioned_key(key, codec=codec)
+    tags = tags or []
+    present = codec.to_json if raw else codec.decode
+
+    if local is not None:
+        found, value = local.get(key)
+        if found:
+            return value
+
+    stale = None
     cached = await redis.get(key)
     if cached:
-        return pickle.loads(cached)
+        data, delta, expires_at = load_cached(cached)
+        res = present(data)
+        if key in _in_flight or not should_refresh_early(delta, expires_at):
+            if local is not None:
+                local.set(key, res, size=len(cached), ttl=ttl, tags=tags)
+            return res
+        stale = res, len(cached)
+
+    async def compute():
+        started_at = time.time()
+        own_db = db_factory() if db_factory and "db" in kwargs else nullcontext()
+        async with own_db as db:
+            func_kwargs = {**kwargs, "db": db} if db is not None else kwargs
+            data = codec.encode(await func(*args, **func_kwargs))
+        finished_at = time.time()
+        payload = dump_cached(
+            CachedValue(
+                data=data,
+                delta=finished_at - started_at,
+                expires_at=finished_at + ttl,
+            )
+        )
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.setex(name=key, time=timedelta(seconds=ttl), value=payload)
+            for tag in tags:
+                pipe.sadd(tag_key(tag), key)
+                pipe.expire(tag_key(tag), TAG_TTL)
+            await pipe.execute()
+        return present(data), len(payload)
+
+    if lock:
+        res, size = await _single_flight(
+            key,
+            lambda: _compute_with_lock(redis, key, compute, stale, present),
+        )
+    else:
+        res, size = await _single_flight(key, compute)
 
-    res = await func(*args, **kwargs)
-    await redis.setex(name=key, time=timedelta(seconds=ttl), value=pickle.dumps(res))
+    if local is not None:
+        local.set(key, res, size=size, ttl=ttl, tags=tags)
     return res
@@ -339,7 +339,11 @@ publicate_book_responses = {
 get_publication_status_responses = {
     200: {
         "description": "Статус публикации успешно получен",
-        "content": {"application/json": {"example": {"render_status": "rendered"}}},
+        "content": {
+            "application/json": {
+                "example": {"render_status": "rendering", "rendered_pages": 125}
+            }
+        },
     },
     404: {
         "description": "Книга не найдена",
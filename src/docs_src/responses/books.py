@@ -1,8 +1,10 @@
 from src.exceptions.books import (
     BookNotFoundHTTPException,
     ContentNotFoundHTTPException,
+    PageIsRenderingHTTPException,
 )
 from src.exceptions.search import (
+    InvalidCursorHTTPException,
     LaterThanAfterEarlierThanHTTPException,
     MinAgeGreaterThanMaxAgeHTTPException,
     MinRatingGreaterThanMaxRatingHTTPException,
@@ -36,7 +38,6 @@ get_filtered_publicated_books_with_pagination_responses = {
                             {"id": 4, "book_id": 1, "title_tag": "string"},
                         ],
                         "genres": [{"genre_id": 1, "title": "Фэнтези"}],
-                        "reviews": [],
                         "avg_rating": None,
                         "readers": 1,
                     },
@@ -57,7 +58,6 @@ get_filtered_publicated_books_with_pagination_responses = {
                         ],
                         "tags": [{"id": 1, "book_id": 2, "title_tag": "pytest"}],
                         "genres": [{"genre_id": 1, "title": "Фэнтези"}],
-                        "reviews": [],
                         "avg_rating": None,
                         "readers": 1,
                     },
@@ -100,6 +100,38 @@ get_filtered_publicated_books_with_pagination_responses = {
     },
 }
 
+get_filtered_publicated_books_with_cursor_responses = {
+    200: {
+        "description": "Страница книг успешно получена",
+        "content": {
+            "application/json": {
+                "example": {
+                    "books": get_filtered_publicated_books_with_pagination_responses[
+                        200
+                    ]["content"]["application/json"]["example"],
+                    "next_cursor": "eyJvIjogImJvb2tfaWQiLCAidiI6IG51bGwsICJpZCI6IDJ9",
+                }
+            }
+        },
+    },
+    400: {
+        "description": "Некорректные параметры фильтрации или cursor",
+        "content": {
+            "application/json": {
+                "examples": {
+                    "InvalidCursor": {
+                        "summary": "Некорректный cursor",
+                        "value": {"detail": f"{InvalidCursorHTTPException.detail}"},
+                    },
+                    **get_filtered_publicated_books_with_pagination_responses[400][
+                        "content"
+                    ]["application/json"]["examples"],
+                }
+            }
+        },
+    },
+}
+
 get_all_genres_responses = {
     200: {
         "description": "Список жанров успешно получен",
@@ -111,7 +143,23 @@ get_all_genres_responses = {
                 ]
             }
         },
-    }
+    },
+    304: {"description": "Список не изменился с версии из If-None-Match"},
+}
+
+get_all_reasons_responses = {
+    200: {
+        "description": "Список причин успешно получен",
+        "content": {
+            "application/json": {
+                "example": [
+                    {"reason_id": 1, "title": "плагиат"},
+                    {"reason_id": 2, "title": "спам"},
+                ]
+            }
+        },
+    },
+    304: {"description": "Список не изменился с версии из If-None-Match"},
 }
 
 get_book_by_id_responses = {
@@ -139,7 +187,6 @@ get_book_by_id_responses = {
                         {"id": 3, "book_id": 1, "title_tag": "python"},
                     ],
                     "genres": [{"genre_id": 1, "title": "Фэнтези"}],
-                    "reviews": [],
                     "avg_rating": None,
                     "readers": 1,
                 }
@@ -189,10 +236,60 @@ get_page_responses = {
         "description": "Страница книги успешно получена",
         "content": {
             "application/json": {
-                "example": [
-                    {"type": "text", "content": "Текст страницы"},
-                    {"type": "image", "path": "https://example.com/images/page1.jpg"},
-                ]
+                "examples": {
+                    "Full": {
+                        "summary": "Список элементов",
+                        "value": [
+                            {"type": "text", "content": "Текст страницы"},
+                            {
+                                "type": "image",
+                                "path": "https://example.com/images/page1_w1027.webp",
+                                "variants": [
+                                    {
+                                        "width": 320,
+                                        "path": "https://example.com/images/page1_w320.webp",
+                                    },
+                                    {
+                                        "width": 640,
+                                        "path": "https://example.com/images/page1_w640.webp",
+                                    },
+                                    {
+                                        "width": 1027,
+                                        "path": "https://example.com/images/page1_w1027.webp",
+                                    },
+                                ],
+                            },
+                        ],
+                    },
+                    "Compact": {
+                        "summary": "compact=true",
+                        "value": {
+                            "v": 2,
+                            "styles": [[11.0, 4, 0, 16, 0, 255, 0.89, -0.22]],
+                            "lines": {
+                                "text": ["Текст страницы"],
+                                "style": [0],
+                                "origin": [56.69, 81.27],
+                                "bbox": [56.69, 71.49, 132.4, 83.69],
+                            },
+                            "images": [
+                                {
+                                    "at": 1,
+                                    "path": "https://example.com/images/page1_w1027.webp",
+                                    "variants": [
+                                        {
+                                            "width": 320,
+                                            "path": "https://example.com/images/page1_w320.webp",
+                                        },
+                                    ],
+                                    "bbox": [56.69, 90.0, 538.58, 330.0],
+                                    "width": 1027,
+                                    "height": 512,
+                                }
+                            ],
+                        },
+                    },
+                },
             }
         },
     },
@@ -217,6 +314,14 @@ get_page_responses = {
             }
         },
     },
+    503: {
+        "description": "Страница еще рендерится",
+        "content": {
+            "application/json": {
+                "example": {"detail": f"{PageIsRenderingHTTPException.detail}"}
+            }
+        },
+    },
 }
 
 report_book_responses = {
@@ -6,6 +6,7 @@ from src.exceptions.reviews import (
     CannotDeleteOthersReviewHTTPException,
 )
 from src.exceptions.books import BookNotFoundHTTPException
+from src.exceptions.search import InvalidCursorHTTPException
 
 add_review_responses = {
     200: {
@@ -124,20 +125,31 @@ get_my_reviews_responses = {
 
 get_book_reviews_responses = {
     200: {
-        "description": "Список отзывов на книгу успешно получен",
+        "description": "Страница отзывов на книгу успешно получена",
         "content": {
             "application/json": {
-                "example": [
-                    {
-                        "review_id": 1,
-                        "book_id": 1,
-                        "user_id": 1,
-                        "rating": 5,
-                        "text": "Отличная книга!",
-                        "publication_date": "2023-10-01T12:00:00",
-                    }
-                ]
+                "example": {
+                    "reviews": [
+                        {
+                            "review_id": 1,
+                            "book_id": 1,
+                            "user_id": 1,
+                            "rating": 5,
+                            "text": "Отличная книга!",
+                            "publication_date": "2023-10-01T12:00:00",
+                        }
+                    ],
+                    "next_cursor": None,
+                }
             }
         },
-    }
+    },
+    400: {
+        "description": "Некорректный cursor",
+        "content": {
+            "application/json": {
+                "example": {"detail": f"{InvalidCursorHTTPException.detail}"}
+            }
+        },
+    },
 }
@@ -24,3 +24,9 @@ class RenderStatus(pyEnum):
     RENDERING = "rendering"  # Идёт рендеринг
     READY = "ready"  # Успешно отрендерено
     FAILED = "failed"  # Ошибка рендеринга
+
+
+class BooksOrderBy(pyEnum):
+    BOOK_ID = "book_id"  # В порядке добавления
+    RATING = "rating"  # Сначала с самым высоким рейтингом
+    READERS = "readers"  # Сначала самые читаемые
@@ -6,6 +6,7 @@ from src.exceptions.base import (
     PermissionDeniedHTTPException,
     ObjectNotFoundException,
     LumeHTTPException,
+    LumeException,
 )
 
 
@@ -57,6 +58,19 @@ class PageNotFoundHTTPException(ObjectNotFoundHTTPException):
         self.detail = f"Страница {page_number} не найдена"
 
 
+class PageIsRenderingException(LumeException):
+    detail = "Страница еще рендерится"
+
+
+class PageIsRenderingHTTPException(LumeHTTPException):
+    detail = "Страница еще рендерится, повторите запрос позже"
+    status_code = 503
+
+    def __init__(self, retry_after: int = 2):
+        super().__init__()
+        self.headers = {"Retry-After": str(retry_after)}
+
+
 class AuthorNotFoundHTTPException(ObjectNotFoundHTTPException):
     detail = "Автор не найден"
 
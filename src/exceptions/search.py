@@ -17,6 +17,10 @@ class MinReadersGreaterThanMaxReadersHTTPException(BadRequestHTTPException):
     detail = "min_readers не может быть больше max_readers"
 
 
+class InvalidCursorHTTPException(BadRequestHTTPException):
+    detail = "Некорректный cursor"
+
+
 class MinAgeGreaterThanMaxAgeException(BadRequestException):
     detail = "min_age не может быть больше max_age"
 
@@ -31,3 +35,7 @@ class MinRatingGreaterThanMaxRatingException(BadRequestException):
 
 class MinReadersGreaterThanMaxReadersException(BadRequestException):
     detail = "min_readers не может быть больше max_readers"
+
+
+class InvalidCursorException(BadRequestException):
+    detail = "Некорректный cursor"
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import uvicorn
 from fastapi.openapi.docs import get_swagger_ui_html
@@ -15,10 +16,28 @@ from src.api.reviews import router as reviews_router
 from src.api.admin import router as admin_router
 
 from src.middlewares.middlewares import BanCheckMiddleware
+from src.utils.progress_buffer import progress_buffer
+from src.decorators.cache.local import local_cache
+from src.connectors.redis_connector import redis_conn
+from src.api.dependencies import s3_pool
 
 logging.basicConfig(level=logging.INFO)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await s3_pool.get()
+    progress_buffer.start()
+    local_cache.start(redis_conn._redis)
+    yield
+    await local_cache.stop()
+    # Дописываем в базу прогресс, накопленный до остановки
+    await progress_buffer.stop()
+    await s3_pool.close()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Lume API",
     description="<h2>Онлайн-библиотека Lume: пользователи, авторы, книги, отзывы, админ панель</h2>",
     version="1.0.0",
@@ -0,0 +1,56 @@
+"""статистика книг
+
+Revision ID: 3f9a1c7d2b41
+Revises: cacce4fb47ec
+Create Date: 2026-10-18 10:12:31.482615
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "3f9a1c7d2b41"
+down_revision: Union[str, None] = "cacce4fb47ec"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "Book_stats",
+        sa.Column("book_id", sa.Integer(), nullable=False),
+        sa.Column("rating_sum", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("rating_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("readers", sa.Integer(), server_default="0", nullable=False),
+        sa.ForeignKeyConstraint(["book_id"], ["Books.book_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("book_id"),
+    )
+    # Заполняем статистику по уже существующим отзывам и читателям
+    op.execute(
+        """
+        INSERT INTO "Book_stats" (book_id, rating_sum, rating_count, readers)
+        SELECT
+            b.book_id,
+            COALESCE(r.rating_sum, 0),
+            COALESCE(r.rating_count, 0),
+            COALESCE(u.readers, 0)
+        FROM "Books" b
+        LEFT JOIN (
+            SELECT book_id, SUM(rating) AS rating_sum, COUNT(*) AS rating_count
+            FROM "Reviews"
+            GROUP BY book_id
+        ) r ON r.book_id = b.book_id
+        LEFT JOIN (
+            SELECT book_id, COUNT(DISTINCT user_id) AS readers
+            FROM "User_books_read"
+            GROUP BY book_id
+        ) u ON u.book_id = b.book_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("Book_stats")
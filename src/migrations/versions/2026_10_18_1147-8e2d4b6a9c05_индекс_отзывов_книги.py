@@ -0,0 +1,30 @@
+"""индекс отзывов книги
+
+Revision ID: 8e2d4b6a9c05
+Revises: 3f9a1c7d2b41
+Create Date: 2026-10-18 11:47:02.913844
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "8e2d4b6a9c05"
+down_revision: Union[str, None] = "3f9a1c7d2b41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_Reviews_book_id_review_id",
+        "Reviews",
+        ["book_id", "review_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_Reviews_book_id_review_id", table_name="Reviews")
@@ -0,0 +1,65 @@
+"""полнотекстовый поиск книг
+
+Revision ID: c41e7f0a2d93
+Revises: 8e2d4b6a9c05
+Create Date: 2026-10-18 13:05:44.120397
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "c41e7f0a2d93"
+down_revision: Union[str, None] = "8e2d4b6a9c05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column(
+        "Books", sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True)
+    )
+    # Заполняем search_vector для уже существующих книг
+    op.execute(
+        """
+        UPDATE "Books" b SET search_vector =
+            setweight(to_tsvector('simple', b.title), 'A')
+            || setweight(to_tsvector('simple', coalesce(b.description, '')), 'B')
+            || setweight(to_tsvector('simple', coalesce((
+                SELECT string_agg(t.title_tag, ' ')
+                FROM "Books_tags" t
+                WHERE t.book_id = b.book_id
+            ), '')), 'C')
+        """
+    )
+    op.create_index(
+        "ix_Books_search_vector",
+        "Books",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_Books_title_trgm",
+        "Books",
+        ["title"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_Books_title_trgm",
+        table_name="Books",
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+    op.drop_index("ix_Books_search_vector", table_name="Books", postgresql_using="gin")
+    op.drop_column("Books", "search_vector")
@@ -0,0 +1,43 @@
+"""контент страниц в jsonb
+
+Revision ID: 5b7c0e3f8a16
+Revises: c41e7f0a2d93
+Create Date: 2026-10-18 14:21:09.675230
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "5b7c0e3f8a16"
+down_revision: Union[str, None] = "c41e7f0a2d93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Строки с JSON переводятся в JSONB прямо в базе.
+    # jsonb не принимает \u0000 (PyMuPDF иногда достает NUL из текста PDF)
+    op.alter_column(
+        "Pages",
+        "content",
+        existing_type=sa.String(),
+        type_=postgresql.JSONB(),
+        existing_nullable=False,
+        postgresql_using="replace(content, '\\u0000', '')::jsonb",
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        "Pages",
+        "content",
+        existing_type=postgresql.JSONB(),
+        type_=sa.String(),
+        existing_nullable=False,
+        postgresql_using="content::text",
+    )
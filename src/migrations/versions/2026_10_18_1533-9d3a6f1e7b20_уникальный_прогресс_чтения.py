@@ -0,0 +1,46 @@
+"""уникальный прогресс чтения
+
+Revision ID: 9d3a6f1e7b20
+Revises: 5b7c0e3f8a16
+Create Date: 2026-10-18 15:33:42.118903
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "9d3a6f1e7b20"
+down_revision: Union[str, None] = "5b7c0e3f8a16"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Перед созданием ограничения оставляем по одной (последней) записи на пару
+    op.execute(
+        """
+        DELETE FROM "User_books_read" AS old
+        USING "User_books_read" AS new
+        WHERE old.user_id = new.user_id
+          AND old.book_id = new.book_id
+          AND old.id < new.id
+        """
+    )
+    op.create_unique_constraint(
+        "uq_User_books_read_user_book", "User_books_read", ["user_id", "book_id"]
+    )
+    op.create_index(
+        "ix_Pages_book_id_page_number",
+        "Pages",
+        ["book_id", "page_number"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_Pages_book_id_page_number", table_name="Pages")
+    op.drop_constraint(
+        "uq_User_books_read_user_book", "User_books_read", type_="unique"
+    )
@@ -0,0 +1,34 @@
+"""чекпоинт рендеринга
+
+Revision ID: 4e8b2c7d1a93
+Revises: 9d3a6f1e7b20
+Create Date: 2026-10-18 16:12:07.540218
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "4e8b2c7d1a93"
+down_revision: Union[str, None] = "9d3a6f1e7b20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "Books",
+        sa.Column("rendered_pages", sa.Integer(), server_default="0", nullable=False),
+    )
+    # Уже отрендеренные книги считаем полностью сохраненными
+    op.execute(
+        'UPDATE "Books" SET rendered_pages = total_pages '
+        "WHERE is_rendered AND total_pages IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("Books", "rendered_pages")
@@ -0,0 +1,27 @@
+"""хеш контента страниц
+
+Revision ID: b61f0d3e9c57
+Revises: 4e8b2c7d1a93
+Create Date: 2026-10-18 16:48:21.306415
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b61f0d3e9c57"
+down_revision: Union[str, None] = "4e8b2c7d1a93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # У старых страниц хеша нет - при замене PDF они перезапишутся один раз
+    op.add_column("Pages", sa.Column("content_hash", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("Pages", "content_hash")
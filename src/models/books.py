@@ -1,5 +1,6 @@
 from datetime import date
-from sqlalchemy import ForeignKey, Enum
+from sqlalchemy import DDL, ForeignKey, Enum, Index, event
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 from src.database import Base
 from src.enums.books import LanguagesEnum, RenderStatus
@@ -39,6 +40,13 @@ class BooksORM(Base):
     )
     is_publicated: Mapped[bool] = mapped_column(default=False)
     total_pages: Mapped[int] = mapped_column(default=1, nullable=True)
+    # Чекпоинт рендеринга: сколько первых страниц уже сохранено в Pages
+    rendered_pages: Mapped[int] = mapped_column(default=0, server_default="0")
+    # Полнотекстовый индекс по названию, описанию и тегам.
+    # Обновляется в BooksRepository.refresh_search_vector
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR, nullable=True, deferred=True
+    )
 
     authors: Mapped[list["UsersORM"]] = relationship(  # type: ignore
         back_populates="books", secondary="Books_authors"
@@ -53,6 +61,25 @@ class BooksORM(Base):
         "ReviewsORM", back_populates="books"
     )
 
+    __table_args__ = (
+        Index("ix_Books_search_vector", "search_vector", postgresql_using="gin"),
+        # Триграммы для нечеткого поиска и ILIKE '%...%' по названию
+        Index(
+            "ix_Books_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+    )
+
+
+# Индекс ix_Books_title_trgm требует расширения pg_trgm
+event.listen(
+    BooksORM.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+)
+
 
 class BooksTagsORM(Base):
     __tablename__ = "Books_tags"
@@ -86,4 +113,21 @@ class PageORM(Base):
         ForeignKey("Books.book_id", ondelete="CASCADE")
     )
     page_number: Mapped[int]
-    content: Mapped[str]
+    content: Mapped[dict | list[dict]] = mapped_column(JSONB)
+    # Хеш контента: при замене PDF перезаписываются только изменившиеся страницы
+    content_hash: Mapped[str | None] = mapped_column(default=None)
+
+    __table_args__ = (Index("ix_Pages_book_id_page_number", "book_id", "page_number"),)
+
+
+class BookStatsORM(Base):
+    """Заранее посчитанные рейтинг и количество читателей книги"""
+
+    __tablename__ = "Book_stats"
+
+    book_id: Mapped[int] = mapped_column(
+        ForeignKey("Books.book_id", ondelete="CASCADE"), primary_key=True
+    )
+    rating_sum: Mapped[int] = mapped_column(default=0, server_default="0")
+    rating_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    readers: Mapped[int] = mapped_column(default=0, server_default="0")
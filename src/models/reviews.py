@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 import typing
-from sqlalchemy import TIMESTAMP, Integer, CheckConstraint, ForeignKey, String
+from sqlalchemy import TIMESTAMP, Integer, CheckConstraint, ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.database import Base
 
@@ -30,4 +30,6 @@ class ReviewsORM(Base):
 
     __table_args__ = (
         CheckConstraint("rating >= 1 AND rating <= 5", name="rating_range_check"),
+        # Для постраничной выдачи отзывов книги (keyset по review_id)
+        Index("ix_Reviews_book_id_review_id", "book_id", "review_id"),
     )
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import TIMESTAMP, ForeignKey
+from sqlalchemy import TIMESTAMP, ForeignKey, UniqueConstraint
 from datetime import datetime, timezone
 from src.database import Base
 
@@ -18,3 +18,8 @@ class UserBooksReadORM(Base):
         TIMESTAMP(timezone=True), default=lambda: datetime.now(timezone.utc)
     )
     last_seen_page: Mapped[int] = mapped_column(default=1)
+
+    __table_args__ = (
+        # Один прогресс чтения на пару (пользователь, книга) - нужно для upsert
+        UniqueConstraint("user_id", "book_id", name="uq_User_books_read_user_book"),
+    )
@@ -1,29 +1,104 @@
-from sqlalchemy import Float, func, select, update, cast
+from sqlalchemy import (
+    Float,
+    and_,
+    func,
+    literal_column,
+    or_,
+    select,
+    tuple_,
+    update,
+    cast,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import NoResultFound
 from src.repositories.database.base import BaseRepository
-from src.models.books import BooksORM, BooksTagsORM, GenresORM, PageORM, BooksGenresORM
-from src.models.user_reads import UserBooksReadORM
+from src.models.books import (
+    BooksORM,
+    BooksTagsORM,
+    BookStatsORM,
+    GenresORM,
+    PageORM,
+    BooksGenresORM,
+)
 from src.schemas.books import (
     Book,
     Tag,
     Genre,
-    BookDataWithRels,
-    BookDataWithAllRelsPrivat,
-    BookDataWithRelsPrivat,
-    BookDataWithAllRels,
+    BookDataWithBaseRels,
+    BookDataWithAllBaseRelsPrivat,
+    BookDataWithBaseRelsPrivat,
+    BookDataWithAllBaseRels,
     BookRenderStatus,
+    BookStats,
     GenresBook,
     Page,
+    PageWithRenderState,
 )
-from src.models.reviews import ReviewsORM
 from src.exceptions.books import BookNotFoundException
+from src.enums.books import BooksOrderBy
+
+
+# Конфигурация без стемминга: книги пишутся на разных языках
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
 
 
 class BooksRepository(BaseRepository):
     model = BooksORM
     schema = Book
 
+    @staticmethod
+    def _rating_and_readers():
+        """Средний рейтинг и число читателей из заранее посчитанной Book_stats"""
+        avg_rating = cast(BookStatsORM.rating_sum, Float) / cast(
+            func.nullif(BookStatsORM.rating_count, 0), Float
+        )
+        readers = func.coalesce(BookStatsORM.readers, 0)
+        return avg_rating, readers
+
+    @staticmethod
+    def _search_rank(q: str):
+        """Релевантность: совпадение слов (title > description > tags) и триграмм"""
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        return func.ts_rank_cd(BooksORM.search_vector, ts_query) + func.word_similarity(
+            q, BooksORM.title
+        )
+
+    @staticmethod
+    def _filter_by_search(query, search_data, avg_rating, readers):
+        if search_data.q:
+            ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, search_data.q)
+            query = query.filter(
+                or_(
+                    BooksORM.search_vector.op("@@")(ts_query),
+                    # Похожее слово в названии - прощает опечатки
+                    BooksORM.title.op("%>")(search_data.q),
+                )
+            )
+        if search_data.book_title:
+            query = query.filter(
+                BooksORM.title.icontains(
+                    search_data.book_title.strip(), autoescape=True
+                )
+            )
+        if search_data.min_age:
+            query = query.filter(BooksORM.age_limit >= search_data.min_age)
+        if search_data.max_age:
+            query = query.filter(BooksORM.age_limit <= search_data.max_age)
+        if search_data.later_than:
+            query = query.filter(BooksORM.date_publicated >= search_data.later_than)
+        if search_data.earlier_than:
+            query = query.filter(BooksORM.date_publicated <= search_data.earlier_than)
+        if search_data.min_rating:
+            query = query.filter(avg_rating >= search_data.min_rating)
+        if search_data.max_rating:
+            query = query.filter(avg_rating <= search_data.max_rating)
+        if search_data.min_readers:
+            query = query.filter(readers >= search_data.min_readers)
+        if search_data.max_readers:
+            query = query.filter(readers <= search_data.max_readers)
+        return query
+
     async def mark_as_rendered(self, book_id: int):
         update_stmt = (
             update(self.model)
@@ -47,22 +122,14 @@ class BooksRepository(BaseRepository):
         return self.schema.model_validate(result, from_attributes=True)
 
     async def get_one_with_rels(self, privat_data=False, **filter_by):
-        avg_rating = cast(func.avg(ReviewsORM.rating), Float).label("rating")
-        readers = func.count(UserBooksReadORM.user_id.distinct()).label("readers")
+        avg_rating, readers = self._rating_and_readers()
         query = (
-            select(self.model, avg_rating, readers)
+            select(self.model, avg_rating.label("rating"), readers.label("readers"))
             .options(joinedload(self.model.authors))
             .options(joinedload(self.model.genres))
             .options(joinedload(self.model.tags))
-            .options(joinedload(self.model.reviews))
             .filter_by(**filter_by)
-            .join(ReviewsORM, ReviewsORM.book_id == BooksORM.book_id, isouter=True)
-            .join(
-                UserBooksReadORM,
-                UserBooksReadORM.book_id == BooksORM.book_id,
-                isouter=True,
-            )
-            .group_by(self.model.book_id)
+            .join(BookStatsORM, BookStatsORM.book_id == BooksORM.book_id, isouter=True)
         )
         result = await self.session.execute(query)
         try:
@@ -71,11 +138,11 @@ class BooksRepository(BaseRepository):
             raise BookNotFoundException from ex
         book, avg_rating, readers = model
         if privat_data:
-            target_schemaDTO = BookDataWithAllRelsPrivat
-            book_schemaDTO = BookDataWithRelsPrivat
+            target_schemaDTO = BookDataWithAllBaseRelsPrivat
+            book_schemaDTO = BookDataWithBaseRelsPrivat
         else:
-            target_schemaDTO = BookDataWithAllRels
-            book_schemaDTO = BookDataWithRels
+            target_schemaDTO = BookDataWithAllBaseRels
+            book_schemaDTO = BookDataWithBaseRels
         return target_schemaDTO(
             **book_schemaDTO.model_validate(book, from_attributes=True).model_dump(),
             avg_rating=avg_rating,
@@ -83,31 +150,23 @@ class BooksRepository(BaseRepository):
         )
 
     async def get_book_with_rels(self, privat_data=False, **filter_by):
-        avg_rating = cast(func.avg(ReviewsORM.rating), Float).label("rating")
-        readers = func.count(UserBooksReadORM.user_id.distinct()).label("readers")
+        avg_rating, readers = self._rating_and_readers()
         query = (
-            select(self.model, avg_rating, readers)
+            select(self.model, avg_rating.label("rating"), readers.label("readers"))
             .options(joinedload(self.model.authors))
             .options(joinedload(self.model.genres))
             .options(joinedload(self.model.tags))
-            .options(joinedload(self.model.reviews))
             .filter_by(**filter_by)
-            .join(ReviewsORM, ReviewsORM.book_id == BooksORM.book_id, isouter=True)
-            .join(
-                UserBooksReadORM,
-                UserBooksReadORM.book_id == BooksORM.book_id,
-                isouter=True,
-            )
-            .group_by(self.model.book_id)
+            .join(BookStatsORM, BookStatsORM.book_id == BooksORM.book_id, isouter=True)
         )
         result = await self.session.execute(query)
         models = result.unique().all()
         if privat_data:
-            target_schemaDTO = BookDataWithAllRelsPrivat
-            book_schemaDTO = BookDataWithRelsPrivat
+            target_schemaDTO = BookDataWithAllBaseRelsPrivat
+            book_schemaDTO = BookDataWithBaseRelsPrivat
         else:
-            target_schemaDTO = BookDataWithAllRels
-            book_schemaDTO = BookDataWithRels
+            target_schemaDTO = BookDataWithAllBaseRels
+            book_schemaDTO = BookDataWithBaseRels
 
         return [
             target_schemaDTO(
@@ -132,55 +191,84 @@ class BooksRepository(BaseRepository):
     async def get_filtered_with_pagination(
         self, search_data, limit: int = 0, offset: int = 5
     ):
-        avg_rating = cast(func.avg(ReviewsORM.rating), Float).label("rating")
-        readers = func.count(UserBooksReadORM.user_id.distinct()).label("readers")
+        avg_rating, readers = self._rating_and_readers()
         query = (
-            select(self.model, avg_rating, readers)
+            select(self.model, avg_rating.label("rating"), readers.label("readers"))
             .filter_by(is_publicated=True)
             .limit(limit)
             .offset(offset)
             .options(joinedload(self.model.authors))
             .options(joinedload(self.model.genres))
             .options(joinedload(self.model.tags))
-            .options(joinedload(self.model.reviews))
-            .join(ReviewsORM, ReviewsORM.book_id == BooksORM.book_id, isouter=True)
-            .join(
-                UserBooksReadORM,
-                UserBooksReadORM.book_id == BooksORM.book_id,
-                isouter=True,
+            .join(BookStatsORM, BookStatsORM.book_id == BooksORM.book_id, isouter=True)
+        )
+        query = self._filter_by_search(query, search_data, avg_rating, readers)
+        if search_data.q:
+            query = query.order_by(
+                self._search_rank(search_data.q).desc(), self.model.book_id
             )
-            .order_by(self.model.book_id)
-            .group_by(self.model.book_id)
+        else:
+            query = query.order_by(self.model.book_id)
+
+        model = await self.session.execute(query)
+        results = model.unique().all()
+        return [
+            BookDataWithAllBaseRels(
+                **BookDataWithBaseRels.model_validate(
+                    book, from_attributes=True
+                ).model_dump(),
+                avg_rating=avg_rating,
+                readers=readers,
+            )
+            for book, avg_rating, readers in results
+        ]
+
+    async def get_filtered_with_cursor(
+        self,
+        search_data,
+        order_by: BooksOrderBy,
+        limit: int = 5,
+        after_value: float | int | None = None,
+        after_id: int | None = None,
+    ):
+        """
+        Keyset-пагинация: вместо OFFSET продолжаем с позиции последней книги.
+        По book_id глубокие страницы идут по индексу и не сканируют пропущенные
+        строки. Рейтинг и число читателей вычисляются из Book_stats, индекса
+        по ним нет - такие страницы по-прежнему сортируют все отфильтрованные книги
+        """
+        avg_rating, readers = self._rating_and_readers()
+        query = (
+            select(self.model, avg_rating.label("rating"), readers.label("readers"))
+            .filter_by(is_publicated=True)
+            .limit(limit)
+            .options(joinedload(self.model.authors))
+            .options(joinedload(self.model.genres))
+            .options(joinedload(self.model.tags))
+            .join(BookStatsORM, BookStatsORM.book_id == BooksORM.book_id, isouter=True)
         )
+        query = self._filter_by_search(query, search_data, avg_rating, readers)
 
-        if search_data.book_title:
-            query = query.filter(
-                func.lower(BooksORM.title).contains(
-                    search_data.book_title.strip().lower()
-                )
+        if order_by == BooksOrderBy.BOOK_ID:
+            query = query.order_by(self.model.book_id)
+            if after_id is not None:
+                query = query.filter(self.model.book_id > after_id)
+        else:
+            sort_field = func.coalesce(
+                avg_rating if order_by == BooksOrderBy.RATING else readers, 0
             )
-        if search_data.min_age:
-            query = query.filter(BooksORM.age_limit >= search_data.min_age)
-        if search_data.max_age:
-            query = query.filter(BooksORM.age_limit <= search_data.max_age)
-        if search_data.later_than:
-            query = query.filter(BooksORM.date_publicated >= search_data.later_than)
-        if search_data.earlier_than:
-            query = query.filter(BooksORM.date_publicated <= search_data.earlier_than)
-        if search_data.min_rating:
-            query = query.having(avg_rating >= search_data.min_rating)
-        if search_data.max_rating:
-            query = query.having(avg_rating <= search_data.max_rating)
-        if search_data.min_readers:
-            query = query.having(readers >= search_data.min_readers)
-        if search_data.max_readers:
-            query = query.having(readers <= search_data.max_readers)
+            query = query.order_by(sort_field.desc(), self.model.book_id.desc())
+            if after_id is not None:
+                query = query.filter(
+                    tuple_(sort_field, self.model.book_id)
+                    < tuple_(after_value, after_id)
+                )
 
         model = await self.session.execute(query)
         results = model.unique().all()
         return [
-            BookDataWithAllRels(
-                **BookDataWithRels.model_validate(
+            BookDataWithAllBaseRels(
+                **BookDataWithBaseRels.model_validate(
                     book, from_attributes=True
                 ).model_dump(),
                 avg_rating=avg_rating,
@@ -189,6 +277,33 @@ class BooksRepository(BaseRepository):
             for book, avg_rating, readers in results
         ]
 
+    @staticmethod
+    def _weighted_vector(text, weight: str):
+        return func.setweight(
+            func.to_tsvector(SEARCH_CONFIG, text), literal_column(f"'{weight}'")
+        )
+
+    async def refresh_search_vector(self, book_id: int):
+        """Пересчитать search_vector после изменения названия, описания или тегов"""
+        tags = (
+            select(func.string_agg(BooksTagsORM.title_tag, " "))
+            .filter(BooksTagsORM.book_id == self.model.book_id)
+            .scalar_subquery()
+        )
+        search_vector = (
+            self._weighted_vector(self.model.title, "A")
+            .op("||")(
+                self._weighted_vector(func.coalesce(self.model.description, ""), "B")
+            )
+            .op("||")(self._weighted_vector(func.coalesce(tags, ""), "C"))
+        )
+        update_stmt = (
+            update(self.model)
+            .filter_by(book_id=book_id)
+            .values(search_vector=search_vector)
+        )
+        await self.session.execute(update_stmt)
+
     async def get_render_status(self, book_id: int):
         query = select(self.model).filter_by(book_id=book_id)
         model = await self.session.execute(query)
@@ -217,3 +332,65 @@ class GenresBooksRepository(BaseRepository):
 class PageRepository(BaseRepository):
     model = PageORM
     schema = Page
+
+    async def get_with_render_state(self, book_id: int, page_number: int):
+        """Состояние рендеринга книги и контент страницы за один запрос"""
+        query = (
+            select(
+                BooksORM.is_rendered,
+                BooksORM.render_status,
+                BooksORM.total_pages,
+                self.model.content,
+            )
+            .select_from(BooksORM)
+            .join(
+                self.model,
+                and_(
+                    self.model.book_id == BooksORM.book_id,
+                    self.model.page_number == page_number,
+                ),
+                isouter=True,
+            )
+            .filter(BooksORM.book_id == book_id)
+            .limit(1)
+        )
+        result = await self.session.execute(query)
+        row = result.one_or_none()
+        if row is None:
+            raise BookNotFoundException
+        return PageWithRenderState.model_validate(row, from_attributes=True)
+
+
+class BookStatsRepository(BaseRepository):
+    model = BookStatsORM
+    schema = BookStats
+
+    async def _increment(self, book_id: int, **deltas: int):
+        """
+        Атомарно прибавляет значения к счетчикам книги.
+        Если строки со статистикой еще нет - создает ее
+        """
+        add_stmt = (
+            insert(self.model)
+            .values(book_id=book_id, **deltas)
+            .on_conflict_do_update(
+                index_elements=[self.model.book_id],
+                set_={
+                    field: getattr(self.model, field) + delta
+                    for field, delta in deltas.items()
+                },
+            )
+        )
+        await self.session.execute(add_stmt)
+
+    async def add_rating(self, book_id: int, rating: int):
+        await self._increment(book_id, rating_sum=rating, rating_count=1)
+
+    async def change_rating(self, book_id: int, old_rating: int, new_rating: int):
+        await self._increment(book_id, rating_sum=new_rating - old_rating)
+
+    async def remove_rating(self, book_id: int, rating: int):
+        await self._increment(book_id, rating_sum=-rating, rating_count=-1)
+
+    async def add_reader(self, book_id: int, count: int = 1):
+        await self._increment(book_id, readers=count)
@@ -1,3 +1,4 @@
+from sqlalchemy import select
 from src.repositories.database.base import BaseRepository
 from src.models.reviews import ReviewsORM
 from src.schemas.reviews import Review
@@ -6,3 +7,21 @@ from src.schemas.reviews import Review
 class ReviewsRepository(BaseRepository):
     model = ReviewsORM
     schema = Review
+
+    async def get_by_book_with_cursor(
+        self, book_id: int, limit: int, after_id: int | None = None
+    ):
+        """Отзывы книги от новых к старым, начиная после отзыва after_id"""
+        query = (
+            select(self.model)
+            .filter_by(book_id=book_id)
+            .order_by(self.model.review_id.desc())
+            .limit(limit)
+        )
+        if after_id is not None:
+            query = query.filter(self.model.review_id < after_id)
+        result = await self.session.execute(query)
+        return [
+            self.schema.model_validate(model, from_attributes=True)
+            for model in result.scalars().all()
+        ]
@@ -1,3 +1,5 @@
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import insert
 from src.repositories.database.base import BaseRepository
 from src.models.user_reads import UserBooksReadORM
 from src.schemas.user_reads import UserBookRead
@@ -6,3 +8,21 @@ from src.schemas.user_reads import UserBookRead
 class UserBooksReadRepository(BaseRepository):
     model = UserBooksReadORM
     schema = UserBookRead
+
+    async def upsert_progress(self, rows: list[dict]) -> list[int]:
+        """
+        Сохраняет последние прочитанные страницы одним запросом.
+        Пары (user_id, book_id) в rows не должны повторяться.
+        Возвращает book_id тех строк, которые были вставлены впервые
+        """
+        stmt = insert(self.model).values(rows)
+        upsert_stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.user_id, self.model.book_id],
+            set_={"last_seen_page": stmt.excluded.last_seen_page},
+        ).returning(
+            self.model.book_id,
+            # xmax = 0 только у только что вставленной строки
+            literal_column("xmax = 0"),
+        )
+        result = await self.session.execute(upsert_stmt)
+        return [book_id for book_id, is_inserted in result.all() if is_inserted]
@@ -1,10 +1,56 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import AsyncIterator
 from fastapi import UploadFile
 from src.config import settings
 from src.exceptions.files import FileNotFoundException
 
 
+class PresignedUrlCache:
+    """
+    Уже подписанные ссылки, которые еще можно переиспользовать.
+
+    Ссылка, подписанная на expires_in секунд, отдается повторно, пока не прошла
+    reuse_fraction ее срока: у клиента всегда остается не меньше
+    (1 - reuse_fraction) * expires_in. Заодно одинаковые ссылки кешируются браузером
+    """
+
+    def __init__(self, max_entries: int = 10_000, reuse_fraction: float = 0.5):
+        self.max_entries = max_entries
+        self.reuse_fraction = reuse_fraction
+        self._urls: OrderedDict[tuple, tuple[str, float]] = OrderedDict()
+
+    def get(self, key: tuple) -> str | None:
+        entry = self._urls.get(key)
+        if entry is None:
+            return None
+        url, reuse_until = entry
+        if reuse_until <= time.monotonic():
+            del self._urls[key]
+            return None
+        self._urls.move_to_end(key)
+        return url
+
+    def set(self, key: tuple, url: str, expires_in: int) -> None:
+        reuse_until = time.monotonic() + expires_in * self.reuse_fraction
+        self._urls[key] = (url, reuse_until)
+        self._urls.move_to_end(key)
+        if len(self._urls) > self.max_entries:
+            self._urls.popitem(last=False)
+
+
+presigned_urls = PresignedUrlCache()
+
+
 class BaseS3Repository:
     bucket_name: str = settings.S3_BUCKET_NAME
+    max_concurrency: int = 16  # одновременных запросов в bulk-операциях
+    delete_batch_size: int = 1000  # максимум ключей в одном DeleteObjects
+    multipart_part_size: int = settings.S3_MULTIPART_PART_SIZE
+    multipart_concurrency: int = settings.S3_MULTIPART_CONCURRENCY
+    download_chunk_size: int = settings.S3_DOWNLOAD_CHUNK_SIZE
 
     def __init__(self, s3_client):
         self.client = s3_client
@@ -20,6 +66,78 @@ class BaseS3Repository:
             Bucket=self.bucket_name, Key=s3_path, Body=file.file
         )
 
+    async def upload_multipart(
+        self,
+        file: UploadFile,
+        s3_path: str,
+        part_size: int | None = None,
+        max_concurrency: int | None = None,
+    ):
+        """
+        Загружает файл частями (multipart upload), не читая его целиком.
+
+        В памяти одновременно не больше max_concurrency частей по part_size байт
+        (S3 требует от всех частей, кроме последней, минимум 5 МиБ).
+        Файл меньше одной части уходит обычным put_object
+        """
+        part_size = part_size or self.multipart_part_size
+        semaphore = asyncio.Semaphore(max_concurrency or self.multipart_concurrency)
+
+        first_part = await file.read(part_size)
+        if len(first_part) < part_size:
+            await self.client.put_object(
+                Bucket=self.bucket_name, Key=s3_path, Body=first_part
+            )
+            return
+
+        upload = await self.client.create_multipart_upload(
+            Bucket=self.bucket_name, Key=s3_path
+        )
+        upload_id = upload["UploadId"]
+
+        async def upload_part(part_number: int, body: bytes):
+            try:
+                response = await self.client.upload_part(
+                    Bucket=self.bucket_name,
+                    Key=s3_path,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body,
+                )
+            finally:
+                semaphore.release()
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+        tasks = []
+        try:
+            body, part_number = first_part, 1
+            await semaphore.acquire()
+            while body:
+                tasks.append(asyncio.create_task(upload_part(part_number, body)))
+                # место под следующую часть освобождается только после загрузки
+                await semaphore.acquire()
+                # упавшая часть прерывает загрузку, не дочитывая файл
+                for task in tasks:
+                    if task.done() and task.exception():
+                        raise task.exception()
+                body, part_number = await file.read(part_size), part_number + 1
+            semaphore.release()
+            parts = await asyncio.gather(*tasks)
+            await self.client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=s3_path,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.client.abort_multipart_upload(
+                Bucket=self.bucket_name, Key=s3_path, UploadId=upload_id
+            )
+            raise
+
     async def check_file_by_path(self, s3_path: str):
         try:
             await self.client.head_object(Bucket=self.bucket_name, Key=s3_path)
@@ -39,43 +157,99 @@ class BaseS3Repository:
         async with response["Body"] as stream:
             return await stream.read()
 
+    async def iter_file_by_path(
+        self, s3_path: str, chunk_size: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """Отдает содержимое файла кусками по chunk_size байт, не читая его целиком"""
+        try:
+            response = await self.client.get_object(
+                Bucket=self.bucket_name, Key=s3_path
+            )
+        except self.client.exceptions.NoSuchKey as ex:
+            raise FileNotFoundException from ex
+        async with response["Body"] as stream:
+            async for chunk in stream.iter_chunks(
+                chunk_size or self.download_chunk_size
+            ):
+                yield chunk
+
     async def delete_by_path(self, s3_path: str):
         await self.client.delete_object(Bucket=self.bucket_name, Key=s3_path)
 
     async def delete_bulk(self, *args):
-        for key in args:
-            await self.client.delete_object(Bucket=self.bucket_name, Key=key)
+        """Удаляет ключи пачками по 1000 через DeleteObjects"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def delete_batch(keys):
+            async with semaphore:
+                response = await self.client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+                )
+            for error in response.get("Errors", []):
+                logging.error(f"Не удалось удалить {error['Key']}: {error['Message']}")
+
+        await asyncio.gather(
+            *(
+                delete_batch(args[i : i + self.delete_batch_size])
+                for i in range(0, len(args), self.delete_batch_size)
+            )
+        )
+
+    async def iter_objects_by_prefix(self, prefix: str = "") -> AsyncIterator[str]:
+        """Ключи с префиксом по мере получения страниц (по 1000) от S3"""
+        paginator = self.client.get_paginator("list_objects_v2")
+        async for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for file in page.get("Contents", []):
+                yield file["Key"]
 
     async def list_objects_by_prefix(self, prefix: str = "") -> list[str]:
         """Вернуть список всех ключей (имён файлов), соответствующих префиксу."""
-        response = await self.client.list_objects_v2(
-            Prefix=prefix, Bucket=self.bucket_name
-        )
-        contents = response.get("Contents", [])
-        result = [file["Key"] for file in contents]
-        return result
+        return [key async for key in self.iter_objects_by_prefix(prefix=prefix)]
 
-    async def get_files_by_prefix(self, prefix: str = "", is_content_bucket=False):
-        files_with_this_prefix = await self.list_objects_by_prefix(
-            prefix=prefix, is_content_bucket=is_content_bucket
-        )
-        return await self.get_bulk(True, False, *files_with_this_prefix)
+    async def get_files_by_prefix(self, prefix: str = ""):
+        files_with_this_prefix = await self.list_objects_by_prefix(prefix=prefix)
+        return await self.get_bulk(True, *files_with_this_prefix)
 
     async def get_bulk(self, only_content=False, *args):
-        results = []
-        for key in args:
-            response = await self.client.get_object(Bucket=self.bucket_name, Key=key)
-            content = await response["Body"].read()
+        """Скачивает файлы параллельно (не больше max_concurrency за раз)"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def get_one(key):
+            async with semaphore:
+                response = await self.client.get_object(
+                    Bucket=self.bucket_name, Key=key
+                )
+                async with response["Body"] as stream:
+                    content = await stream.read()
             if only_content:
-                results.append(content)
-            else:
-                results.append({"key": key, "content": content})
-        return results
+                return content
+            return {"key": key, "content": content}
+
+        return list(await asyncio.gather(*(get_one(key) for key in args)))
 
     async def generate_url(self, file_path: str = "", expires_in: int = 3600):
-        url = await self.client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": self.bucket_name, "Key": file_path},
-            ExpiresIn=expires_in,  # Срок действия в секундах
-        )
+        cache_key = (self.bucket_name, file_path, expires_in)
+        url = presigned_urls.get(cache_key)
+        if url is None:
+            url = await self.client.generate_presigned_url(
+                "get_object",
+                Params={"Bucket": self.bucket_name, "Key": file_path},
+                ExpiresIn=expires_in,  # Срок действия в секундах
+            )
+            presigned_urls.set(cache_key, url, expires_in=expires_in)
         return url
+
+    async def generate_urls(
+        self, file_paths: list[str], expires_in: int = 3600
+    ) -> list[str]:
+        """
+        Подписывает пачку ключей одновременно:
+        каждый уникальный ключ - не больше одного раза
+        """
+        unique_paths = list(dict.fromkeys(file_paths))
+        signed = await asyncio.gather(
+            *(self.generate_url(file_path, expires_in) for file_path in unique_paths)
+        )
+        urls = dict(zip(unique_paths, signed))
+        return [urls[file_path] for file_path in file_paths]
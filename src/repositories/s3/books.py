@@ -19,9 +19,31 @@ class BooksS3Repository(BaseS3Repository):
 
     async def save_content(self, book_id: int, file: UploadFile):
         await file.seek(0)
-        await self.client.put_object(
-            Bucket=self.bucket_name,
-            Key=f"{self.prefix_name}/{book_id}/book.pdf",
-            Body=file.file,
+        await self.upload_multipart(
+            file=file, s3_path=f"{self.prefix_name}/{book_id}/book.pdf"
         )
         return f"{self.prefix_name}/{book_id}/book.pdf"
+
+    async def sign_page_content(self, content: dict, expires_in: int = 3600):
+        """
+        Возвращает копию компактного контента страницы, в которой пути
+        к изображениям (и к их вариантам разной ширины) заменены на подписанные ссылки
+        """
+        images = content["images"]
+        paths = [item["path"] for item in images]
+        for item in images:
+            paths.extend(variant["path"] for variant in item.get("variants", []))
+        signed = dict(
+            zip(paths, await self.generate_urls(paths, expires_in=expires_in))
+        )
+        signed_images = []
+        for item in images:
+            signed_item = {**item, "path": signed[item["path"]]}
+            # у страниц, отрендеренных до вариантов ширины, ключа variants нет
+            if "variants" in item:
+                signed_item["variants"] = [
+                    {**variant, "path": signed[variant["path"]]}
+                    for variant in item["variants"]
+                ]
+            signed_images.append(signed_item)
+        return {**content, "images": signed_images}
@@ -1,5 +1,4 @@
 from datetime import date, datetime
-import json
 from typing import Annotated, List
 from pydantic import BaseModel, EmailStr, Field, constr, field_validator, conint
 from src.enums.users import AllUsersRolesEnum
@@ -11,29 +10,28 @@ from src.schemas.reviews import Review
 class Page(BaseModel):
     page_number: int
     book_id: int
-    content: str | list[dict]
-
-    @field_validator("content")
-    def content_to_str(cls, value: str) -> list[dict]:
-        """Преобразуем строку в JSON"""
-        if isinstance(value, str):
-            return json.loads(value)  # превращаем список в JSON-строку
-        return value
+    # хранится в Postgres как JSONB: dict - компактный формат (PageContentCodec),
+    # list - развернутый формат страниц, отрендеренных до него
+    content: dict | list[dict]
+    content_hash: str | None = None
 
 
 class PageAdd(BaseModel):
     page_number: int
     book_id: int
-    content: str | list[dict]
+    content: dict | list[dict]
+    content_hash: str | None = None
+
 
-    @field_validator("content")
-    def content_to_str(cls, value: list[dict]) -> str:
-        """Мы будем хранить JSON в виде строки, поэтому требуется преобразование"""
-        if isinstance(value, list):
-            return json.dumps(
-                value, ensure_ascii=False
-            )  # превращаем список в JSON-строку
-        return value
+class PageWithRenderState(BaseModel):
+    """Страница вместе с состоянием рендеринга книги (одним запросом)"""
+
+    is_rendered: bool
+    render_status: RenderStatus | None
+    total_pages: int | None
+    content: (
+        dict | list[dict] | None
+    )  # None - такой страницы нет (или она еще не готова)
 
 
 # Теги
@@ -162,18 +160,22 @@ class BookData(Book):
     pages_count: int
 
 
-class BookDataWithRels(Book):
+class BookDataWithBaseRels(Book):
+    """Книга без отзывов - их отдает GET /reviews/by_book/{book_id} по страницам"""
+
     authors: list[UserPublicData]  # список авторов
     tags: list[Tag]  # список тегов
     genres: list[Genre]  # список жанров
+
+
+class BookDataWithRels(BookDataWithBaseRels):
     reviews: list[Review]  # список отзывов
 
 
-class BookDataWithRelsPrivat(Book):
+class BookDataWithBaseRelsPrivat(Book):
     authors: list[User]  # список авторов
     tags: list[Tag]  # список тегов
     genres: list[Genre]  # список жанров
-    reviews: list[Review]  # список отзывов
 
 
 class RatingReadersRel(BaseModel):
@@ -181,14 +183,26 @@ class RatingReadersRel(BaseModel):
     readers: int | None
 
 
-class BookDataWithAllRels(RatingReadersRel, BookDataWithRels):
+class BookStats(BaseModel):
+    book_id: int
+    rating_sum: int
+    rating_count: int
+    readers: int
+
+
+class BookDataWithAllBaseRels(RatingReadersRel, BookDataWithBaseRels):
     pass
 
 
-class BookDataWithAllRelsPrivat(RatingReadersRel, BookDataWithRelsPrivat):
+class BookDataWithAllBaseRelsPrivat(RatingReadersRel, BookDataWithBaseRelsPrivat):
     pass
 
 
+class BooksCursorPage(BaseModel):
+    books: list[BookDataWithAllBaseRels]
+    next_cursor: str | None  # None - это последняя страница
+
+
 class BookDataWithTagRel(BookData):
     tags: list[int]  # список тегов
 
@@ -203,6 +217,7 @@ class FullDataAboutBook(BookData):
 
 class BookRenderStatus(BaseModel):
     render_status: RenderStatus | None
+    rendered_pages: int = 0  # сколько страниц уже сохранено
 
 
 # Авторы
@@ -22,3 +22,8 @@ class Review(ReviewAdd):
 class ReviewPut(BaseModel):
     rating: int = Field(le=5, ge=1)
     text: str
+
+
+class ReviewsCursorPage(BaseModel):
+    reviews: list[Review]
+    next_cursor: str | None  # None - это последняя страница
@@ -92,23 +92,26 @@ class AdminService(BaseService):
         ):
             raise TagAlreadyExistsException
         tag = await self.db.tags.add(data=data)
+        await self.db.books.refresh_search_vector(book_id=data.book_id)
         await self.db.commit()
         return tag
 
     async def delete_tag(self, tag_id: int):
         try:
-            await self.db.tags.get_one(id=tag_id)
+            tag = await self.db.tags.get_one(id=tag_id)
         except ObjectNotFoundException as ex:
             raise TagNotFoundException from ex
         await self.db.tags.delete(id=tag_id)
+        await self.db.books.refresh_search_vector(book_id=tag.book_id)
         await self.db.commit()
 
     async def edit_tag(self, tag_id: int, data):
         try:
-            await self.db.tags.get_one(id=tag_id)
+            tag = await self.db.tags.get_one(id=tag_id)
         except ObjectNotFoundException as ex:
             raise TagNotFoundException from ex
         await self.db.tags.edit(data=data, id=tag_id)
+        await self.db.books.refresh_search_vector(book_id=tag.book_id)
         await self.db.commit()
 
     async def add_reason(self, data):
@@ -59,6 +59,7 @@ class AuthorsService(BaseService):
                 await self.db.books_genres.add_bulk(data_to_genres_m2m)
         except ForeignKeyException as ex:
             raise GenreNotFoundException from ex
+        await self.db.books.refresh_search_vector(book_id=book.book_id)
         await self.db.commit()
         return book
 
@@ -131,6 +132,7 @@ class AuthorsService(BaseService):
             await self.db.books.edit(
                 data=book_patch_data, is_patch=True, book_id=book_id
             )
+        await self.db.books.refresh_search_vector(book_id=book_id)
         await self.db.commit()
 
     async def delete_book(self, should_check_owner: bool, book_id: int, user_id: int):
@@ -238,9 +240,9 @@ class AuthorsService(BaseService):
         if not await self.s3.books.check_file_by_path(f"books/{book_id}/book.pdf"):
             raise ContentNotFoundException
         await self.s3.books.save_content(book_id=book_id, file=file)
-        await self.db.pages.delete(book_id=book_id)
+        # Страницы не удаляются: пока идет рендеринг, читатели видят старый текст,
+        # а change_content перезапишет только изменившиеся страницы
         change_content.delay(book_id)
-        await self.db.commit()
 
     async def publicate_book(
         self,
@@ -1,10 +1,14 @@
 from pydantic import BaseModel
 from src.services.base import BaseService
 from src.api.dependencies import UserIdDep
-from src.utils.helpers import TextFormatingManager
+from src.utils.helpers import CursorManager, TextFormatingManager
+from src.utils.page_content import PageContentCodec
+from src.utils.render_requests import request_page_render
+from src.connectors.redis_connector import redis_conn
 from src.exceptions.books import (
     BookNotFoundException,
     ContentNotFoundException,
+    PageIsRenderingException,
     PageNotFoundException,
 )
 from src.exceptions.search import (
@@ -16,11 +20,20 @@ from src.exceptions.search import (
 from src.exceptions.reports import ReasonNotFoundException
 from src.exceptions.base import ObjectNotFoundException, ForeignKeyException
 from src.schemas.reports import ReportAdd
-from src.schemas.user_reads import UserBookReadAdd, UserBookReadEdit
+from src.schemas.books import BooksCursorPage
+from src.enums.books import BooksOrderBy, RenderStatus
 from src.validation.search import SearchValidator
 
 
 class BooksService(BaseService):
+    async def _sign_covers(self, books):
+        books_with_cover = [book for book in books if book.cover_link]
+        urls = await self.s3.books.generate_urls(
+            [book.cover_link for book in books_with_cover]
+        )
+        for book, url in zip(books_with_cover, urls):
+            book.cover_link = url
+
     async def get_filtered_publicated_books_with_pagination(
         self, search_data, pagination_data
     ):
@@ -40,16 +53,51 @@ class BooksService(BaseService):
         books = await self.db.books.get_filtered_with_pagination(
             limit=limit, offset=offset, search_data=search_data
         )
-        for book in books:
-            if book.cover_link:
-                book.cover_link = await self.s3.books.generate_url(
-                    file_path=book.cover_link
-                )
+        await self._sign_covers(books)
         return books
 
+    async def get_filtered_publicated_books_with_cursor(
+        self, search_data, pagination_data
+    ):
+        SearchValidator.validate_book_filters(**search_data.model_dump())
+        order_by = pagination_data.order_by
+        after_value, after_id = None, None
+        if pagination_data.cursor:
+            after_value, after_id = CursorManager.decode(
+                cursor=pagination_data.cursor,
+                order_by=order_by.value,
+                nullable_value=order_by == BooksOrderBy.BOOK_ID,
+            )
+        # Берем на одну книгу больше, чтобы понять, есть ли следующая страница
+        books = await self.db.books.get_filtered_with_cursor(
+            search_data=search_data,
+            order_by=order_by,
+            limit=pagination_data.per_page + 1,
+            after_value=after_value,
+            after_id=after_id,
+        )
+        next_cursor = None
+        if len(books) > pagination_data.per_page:
+            books = books[: pagination_data.per_page]
+            last_book = books[-1]
+            if order_by == BooksOrderBy.RATING:
+                last_value = last_book.avg_rating or 0
+            elif order_by == BooksOrderBy.READERS:
+                last_value = last_book.readers or 0
+            else:
+                last_value = None
+            next_cursor = CursorManager.encode(
+                order_by=order_by.value, value=last_value, last_id=last_book.book_id
+            )
+        await self._sign_covers(books)
+        return BooksCursorPage(books=books, next_cursor=next_cursor)
+
     async def get_all_genres(self):
         return await self.db.genres.get_all()
 
+    async def get_all_reasons(self):
+        return await self.db.reasons.get_all()
+
     async def get_book_by_id(self, book_id: int):
         try:
             return await self.db.books.get_one_with_rels(book_id=book_id)
@@ -71,53 +119,33 @@ class BooksService(BaseService):
         page_number: int,
         book_id: int,
     ):
-        try:
-            book = await self.db.books.get_one(book_id=book_id)
-        except ObjectNotFoundException as ex:
-            raise BookNotFoundException from ex
-        if not book.is_rendered:
+        page = await self.db.pages.get_with_render_state(
+            book_id=book_id, page_number=page_number
+        )
+        if not page.is_rendered:
             raise ContentNotFoundException
-        try:
-            page = await self.db.pages.get_one(book_id=book_id, page_number=page_number)
-        except ObjectNotFoundException:
+        if page.total_pages is None or page_number > page.total_pages:
             raise PageNotFoundException(page_number=page_number)
-        if (book.total_pages is None) or (page_number > book.total_pages):
-            raise PageNotFoundException(page_number=page_number)
-        user_read_book = await self.db.user_reads.get_filtered(
-            user_id=user_id, book_id=book_id
-        )
-        if not user_read_book:
-            await self.db.user_reads.add(
-                UserBookReadAdd(
-                    book_id=book_id, user_id=user_id, last_seen_page=page_number
-                )
-            )
-        else:
-            await self.db.user_reads.edit(
-                UserBookReadEdit(last_seen_page=page_number),
-                user_id=user_id,
-                book_id=book_id,
+        if page.content is None:
+            # Готовая или упавшая книга эту страницу уже не отрендерит
+            if page.render_status != RenderStatus.RENDERING:
+                raise PageNotFoundException(page_number=page_number)
+            # Книга еще дорендеривается: просим отрендерить страницу вне очереди
+            await request_page_render(
+                redis_conn._redis, book_id=book_id, page_number=page_number
             )
-        await self.db.commit()
+            raise PageIsRenderingException
 
-        page = await self.db.pages.get_one(book_id=book_id, page_number=page_number)
-        page_content = page.content
-        # Убрать лишние пробелы из текста
-        for ind, content_info in enumerate(page_content):
-            if content_info["type"] == "image":
-                path_in_s3 = content_info["path"]
-                access_url = await self.s3.books.generate_url(
-                    file_path=path_in_s3,
-                    expires_in=60 * 60 * 24,  # 1 день
-                )
-                content_info["path"] = access_url
-            else:
-                content_info["content"] = TextFormatingManager.replace_nbsp(
-                    content_info["content"]
-                )
-            page_content[ind] = content_info
+        # Страницы старого формата приводятся к компактному.
+        # Ссылки на изображения подписываются, а для старых клиентов контент
+        # разворачивается отдельно (см. BooksCacheManager.page)
+        page_content = PageContentCodec.to_compact(page.content)
+        # Убрать лишние пробелы из текста.
+        lines = page_content["lines"]
+        lines["text"] = [
+            TextFormatingManager.replace_nbsp(text) for text in lines["text"]
+        ]
 
-        page.content = page_content
         return page_content
 
     async def report_book(self, book_id: int, data: BaseModel):
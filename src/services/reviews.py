@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from src.services.base import BaseService
-from src.schemas.reviews import ReviewAdd
+from src.schemas.reviews import ReviewAdd, ReviewsCursorPage
+from src.utils.helpers import CursorManager
 from src.exceptions.reviews import (
     CannotDeleteOthersReviewException,
     CannotEditOthersReviewException,
@@ -33,12 +34,14 @@ class ReviewsService(BaseService):
                 book_id=book_id,
             )
         )
+        await self.db.book_stats.add_rating(book_id=book_id, rating=review.rating)
         await self.db.commit()
         return review
 
     async def edit_review(
         self, review_id: int, user_id: int, user_role: str, data: BaseModel
-    ):
+    ) -> int:
+        """Возвращает id книги отзыва (для сброса ее кеша)"""
         try:
             review = await self.db.reviews.get_one(review_id=review_id)
         except ObjectNotFoundException as ex:
@@ -47,9 +50,14 @@ class ReviewsService(BaseService):
             if user_id != review.user_id:
                 raise CannotEditOthersReviewException
         await self.db.reviews.edit(data=data, review_id=review_id)
+        await self.db.book_stats.change_rating(
+            book_id=review.book_id, old_rating=review.rating, new_rating=data.rating
+        )
         await self.db.commit()
+        return review.book_id
 
-    async def delete_review(self, user_id: int, user_role: str, review_id: int):
+    async def delete_review(self, user_id: int, user_role: str, review_id: int) -> int:
+        """Возвращает id книги отзыва (для сброса ее кеша)"""
         try:
             review = await self.db.reviews.get_one(review_id=review_id)
         except ObjectNotFoundException as ex:
@@ -58,10 +66,29 @@ class ReviewsService(BaseService):
             if user_id != review.user_id:
                 raise CannotDeleteOthersReviewException
         await self.db.reviews.delete(review_id=review_id)
+        await self.db.book_stats.remove_rating(
+            book_id=review.book_id, rating=review.rating
+        )
         await self.db.commit()
+        return review.book_id
 
     async def get_my_reviews(self, user_id: int):
         return await self.db.reviews.get_filtered(user_id=user_id)
 
-    async def get_book_reviews(self, book_id: int):
-        return await self.db.reviews.get_filtered(book_id=book_id)
+    async def get_book_reviews(self, book_id: int, pagination_data):
+        after_id = None
+        if pagination_data.cursor:
+            _, after_id = CursorManager.decode(
+                cursor=pagination_data.cursor, order_by="review_id"
+            )
+        # Берем на один отзыв больше, чтобы понять, есть ли следующая страница
+        reviews = await self.db.reviews.get_by_book_with_cursor(
+            book_id=book_id, limit=pagination_data.limit + 1, after_id=after_id
+        )
+        next_cursor = None
+        if len(reviews) > pagination_data.limit:
+            reviews = reviews[: pagination_data.limit]
+            next_cursor = CursorManager.encode(
+                order_by="review_id", value=None, last_id=reviews[-1].review_id
+            )
+        return ReviewsCursorPage(reviews=reviews, next_cursor=next_cursor)
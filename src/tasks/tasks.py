@@ -1,96 +1,346 @@
 from datetime import datetime, timedelta
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from src.tasks.celery_app import celery_app
-from sqlalchemy import insert, update
+from sqlalchemy import case, column, delete, func, select, true, update
+from sqlalchemy.dialects.postgresql import JSONB
 from src.config import Settings, get_settings
 from src.models.books import BooksORM, PageORM
 from src.api.dependencies import get_sync_session
 from src.api.dependencies import get_sync_db_np
 import fitz
+from src.utils.book_renderer import ParallelBookRenderer, upload_images
 from src.utils.helpers import PDFRenderer
+from src.utils.page_writer import copy_pages
+from src.utils.render_requests import pop_requested_pages
 from src.exceptions.files import FileNotFoundException
-from src.schemas.books import Book, PageAdd
+from src.schemas.books import Book
 from src.analytics.excel.active_users import UsersDFExcelRepository
 from src.schemas.analytics import UsersStatement, UsersStatementWithoutDate
 from src.repositories.database.utils import AnalyticsQueryFactory
+from src.connectors.redis_connector import redis_sync_conn
+from src.decorators.cache.tags import CacheTags, invalidate_tags_sync
 import logging
 
 settings = get_settings()
 
 
-@celery_app.task
-def render_book(book_id: int):
+def download_book_pdf(s3, book_id: int, file):
+    """Скачивает books/{book_id}/book.pdf в открытый файл кусками"""
+    try:
+        response = s3.client.get_object(
+            Bucket=settings.S3_BUCKET_NAME, Key=f"books/{book_id}/book.pdf"
+        )
+    except s3.client.exceptions.NoSuchKey as ex:
+        logging.error("не найден файл book.pdf")
+        raise FileNotFoundException from ex
+    with response["Body"] as stream:
+        for chunk in stream.iter_chunks(settings.S3_DOWNLOAD_CHUNK_SIZE):
+            file.write(chunk)
+    file.flush()
+
+
+@celery_app.task(
+    bind=True,
+    autoretry_for=(Exception,),
+    dont_autoretry_for=(FileNotFoundException,),
+    max_retries=settings.RENDER_MAX_RETRIES,
+    retry_backoff=True,
+)
+def render_book(self, book_id: int):
     with get_sync_db_np() as db:
-        update_render_status_stmt = (
-            update(BooksORM)
-            .filter_by(book_id=book_id)
-            .values(render_status="RENDERING")
+        try:
+            book = render_book_pages(db, book_id=book_id)
+        except Exception as ex:
+            db.session.rollback()
+            # Уже сохраненные пачки остаются: повтор продолжит с чекпоинта.
+            # Пока повтор ждет своей очереди, статус остается RENDERING -
+            # недостающие страницы можно запросить вне очереди
+            if (
+                isinstance(ex, FileNotFoundException)
+                or self.request.retries >= self.max_retries
+            ):
+                mark_failed_stmt = (
+                    update(BooksORM)
+                    .filter_by(book_id=book_id)
+                    .values(render_status="FAILED")
+                )
+                db.session.execute(mark_failed_stmt)
+                db.commit()
+            logging.exception(f"Ошибка рендеринга книги (id={book_id})")
+            raise
+    # Число страниц и статус должны сразу попасть в ответы API.
+    # Кеш перезаписанных страниц сбрасывается по мере их сохранения
+    invalidate_tags_sync(redis_sync_conn, CacheTags.BOOKS)
+    logging.info(f'Рендеринг книги "{book.title}" завершен')
+
+
+def render_book_pages(db, book_id: int) -> Book:
+    """
+    Рендерит книгу, начиная со страницы после чекпоинта Books.rendered_pages.
+    Каждая пачка страниц коммитится вместе с новым значением чекпоинта.
+
+    Как только готовы первые RENDER_PRIORITY_PAGES страниц, книга помечается
+    отрендеренной и ее можно читать, остальное дорендеривается следом.
+    Страницы, запрошенные читателями раньше очереди, рендерятся между пачками
+    """
+    update_render_status_stmt = (
+        update(BooksORM)
+        .filter_by(book_id=book_id)
+        .values(render_status="RENDERING")
+        .returning(BooksORM.rendered_pages, BooksORM.is_rendered)
+    )
+    rendered_pages, is_readable = db.session.execute(update_render_status_stmt).one()
+    db.commit()
+    if rendered_pages:
+        logging.info(
+            f"Продолжаю рендеринг книги (id={book_id}) со страницы {rendered_pages + 1}"
         )
-        db.session.execute(update_render_status_stmt)
-        db.commit()
 
+    # PDF пишется во временный файл по кускам, а не читается в память целиком
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as file_pdf:
         with get_sync_session() as s3:
-            try:
-                bucket_name = settings.S3_BUCKET_NAME
-                response = s3.client.get_object(
-                    Bucket=bucket_name, Key=f"books/{book_id}/book.pdf"
-                )
-                with response["Body"] as stream:
-                    file_pdf = stream.read()
-            except s3.client.exceptions.NoSuchKey as ex:
-                logging.error("не найден файл book.pdf")
-                raise FileNotFoundException from ex
-
-        with fitz.open(stream=file_pdf, filetype="pdf") as doc:
-            # Парсинг изображений и текста из книги
-            files_to_add, pages = PDFRenderer.parse_images_and_text_from_pdf(
-                doc=doc, book_id=book_id
-            )
+            download_book_pdf(s3, book_id=book_id, file=file_pdf)
+        renderer = ParallelBookRenderer(
+            pdf_path=file_pdf.name,
+            book_id=book_id,
+            workers=settings.RENDER_WORKERS,
+            pages_per_chunk=settings.RENDER_PAGES_PER_CHUNK,
+        )
+        # Пачки страниц разбираются в пуле процессов; пока готовится следующая,
+        # изображения текущей параллельно уходят в S3, а строки - в Pages.
+        # Ключ изображения - хеш его содержимого. Ключи, которые уже лежат в S3
+        # (список берется при старте), не загружаются снова: повтор после
+        # недописанной пачки догружает только недостающие изображения
+        with (
+            fitz.open(file_pdf.name) as doc,
+            get_sync_session() as s3,
+            ThreadPoolExecutor(settings.RENDER_UPLOAD_CONCURRENCY) as uploader,
+        ):
             num_pages = doc.page_count
-            with get_sync_session() as s3:
-                for file in files_to_add:
-                    s3.client.put_object(
-                        Key=file["Key"],
-                        Bucket=settings.S3_BUCKET_NAME,
-                        Body=file["Body"],
+            readable_from = min(settings.RENDER_PRIORITY_PAGES, num_pages)
+            # Индекс уже загруженных изображений книги (в т.ч. прошлым рендерингом)
+            uploaded = list_book_images(s3, book_id=book_id)
+            for images, pages in renderer.iter_chunks(
+                start=rendered_pages,
+                stop=num_pages,
+                priority_pages=settings.RENDER_PRIORITY_PAGES,
+            ):
+                upload_images(
+                    s3.client,
+                    settings.S3_BUCKET_NAME,
+                    images,
+                    executor=uploader,
+                    uploaded=uploaded,
+                )
+                changed_pages = save_pages(db, book_id=book_id, pages=pages)
+                rendered_pages = pages[-1]["page_number"]
+                checkpoint_stmt = (
+                    update(BooksORM)
+                    .filter_by(book_id=book_id)
+                    .values(rendered_pages=rendered_pages)
+                )
+                db.session.execute(checkpoint_stmt)
+                db.commit()
+                invalidate_pages(book_id=book_id, page_numbers=changed_pages)
+
+                if not is_readable and rendered_pages >= readable_from:
+                    mark_readable_stmt = (
+                        update(BooksORM)
+                        .filter_by(book_id=book_id)
+                        .values(is_rendered=True, total_pages=num_pages)
                     )
+                    db.session.execute(mark_readable_stmt)
+                    db.commit()
+                    is_readable = True
+                    invalidate_tags_sync(redis_sync_conn, CacheTags.BOOKS)
+
+                render_requested_pages(
+                    db,
+                    s3,
+                    doc,
+                    book_id=book_id,
+                    after=rendered_pages,
+                    executor=uploader,
+                    uploaded=uploaded,
+                )
 
-            add_pages_stmt = insert(PageORM).values(
-                [PageAdd(**item.model_dump()).model_dump() for item in pages]
+            # Страницы, которых нет в новой версии книги
+            delete_extra_pages_stmt = (
+                delete(PageORM)
+                .where(PageORM.book_id == book_id, PageORM.page_number > num_pages)
+                .returning(PageORM.page_number)
             )
+            deleted_pages = db.session.execute(delete_extra_pages_stmt).scalars().all()
+            db.commit()
+            invalidate_pages(book_id=book_id, page_numbers=deleted_pages)
+
+            # Изображения прошлой версии книги, на которые больше нет ссылок
+            stale = uploaded - referenced_image_keys(db, book_id=book_id)
+            delete_image_keys(s3, keys=list(stale))
+
+    update_stmt = (
+        update(BooksORM)
+        .filter_by(book_id=book_id)
+        .values(is_rendered=True, render_status="READY", total_pages=num_pages)
+        .returning(BooksORM)
+    )
+    result = db.session.execute(update_stmt).scalar_one()
+    book = Book.model_validate(result, from_attributes=True)
+    db.commit()
+    return book
 
-            db.session.execute(add_pages_stmt)
 
-            update_stmt = (
-                update(BooksORM)
-                .filter_by(book_id=book_id)
-                .values(is_rendered=True, render_status="READY", total_pages=num_pages)
-                .returning(BooksORM)
+def save_pages(db, book_id: int, pages: list[dict]) -> list[int]:
+    """
+    Сохраняет отрендеренные страницы по хешу контента: новые добавляет
+    через COPY, изменившиеся перезаписывает, совпадающие (в т.ч. уже отрендеренные
+    по запросу или прошлой версией PDF) пропускает.
+    Возвращает номера перезаписанных страниц - их кеш нужно сбросить
+    """
+    existing_stmt = select(
+        PageORM.page_number, PageORM.page_id, PageORM.content_hash
+    ).where(
+        PageORM.book_id == book_id,
+        PageORM.page_number.in_([page["page_number"] for page in pages]),
+    )
+    existing = {
+        page_number: (page_id, content_hash)
+        for page_number, page_id, content_hash in db.session.execute(existing_stmt)
+    }
+    new_pages, changed_pages, changed_numbers = [], [], []
+    for page in pages:
+        if page["page_number"] not in existing:
+            new_pages.append(page)
+            continue
+        page_id, content_hash = existing[page["page_number"]]
+        if content_hash != page["content_hash"]:
+            changed_pages.append(
+                {
+                    "page_id": page_id,
+                    "content": page["content"],
+                    "content_hash": page["content_hash"],
+                }
             )
-            model = db.session.execute(update_stmt)
-            result = model.scalar_one()
-            book = Book.model_validate(result, from_attributes=True)
-            db.commit()
-    logging.info(f'Рендеринг книги "{book.title}" завершен')
+            changed_numbers.append(page["page_number"])
+    if new_pages:
+        copy_pages(db, new_pages, chunk_size=settings.RENDER_COPY_CHUNK_SIZE)
+    if changed_pages:
+        # bulk UPDATE по первичному ключу
+        db.session.execute(update(PageORM), changed_pages)
+    return changed_numbers
+
+
+def invalidate_pages(book_id: int, page_numbers: list[int]):
+    if page_numbers:
+        invalidate_tags_sync(
+            redis_sync_conn,
+            *(CacheTags.book_page(book_id, number) for number in page_numbers),
+        )
+
+
+def render_requested_pages(
+    db, s3, doc, book_id: int, after: int, executor, uploaded: set[str]
+):
+    """Рендерит вне очереди страницы, которые уже запросили читатели"""
+    requested = [
+        page_number
+        for page_number in pop_requested_pages(redis_sync_conn, book_id=book_id)
+        if after < page_number <= doc.page_count
+    ]
+    if not requested:
+        return
+    images, pages = [], []
+    for page_number in requested:
+        page_images, page = PDFRenderer.parse_text_end_images_from_page(
+            doc, page_number=page_number, book_id=book_id
+        )
+        images.extend(page_images)
+        pages.append(page.model_dump())
+    upload_images(
+        s3.client,
+        settings.S3_BUCKET_NAME,
+        images,
+        executor=executor,
+        uploaded=uploaded,
+    )
+    save_pages(db, book_id=book_id, pages=pages)
+    db.commit()
+    logging.info(f"Книга (id={book_id}): вне очереди отрендерены страницы {requested}")
+
+
+def iter_book_image_keys(s3, book_id: int):
+    """Ключи изображений книги страницами листинга (до 1000 ключей)"""
+    paginator = s3.client.get_paginator("list_objects_v2")
+    pages = paginator.paginate(
+        Prefix=f"books/{book_id}/images", Bucket=settings.S3_BUCKET_NAME
+    )
+    for page in pages:
+        yield [file["Key"] for file in page.get("Contents", [])]
+
+
+def list_book_images(s3, book_id: int) -> set[str]:
+    return {key for keys in iter_book_image_keys(s3, book_id) for key in keys}
+
+
+def delete_image_keys(s3, keys: list[str]):
+    # DeleteObjects принимает не больше 1000 ключей
+    for i in range(0, len(keys), 1000):
+        s3.client.delete_objects(
+            Bucket=settings.S3_BUCKET_NAME,
+            Delete={
+                "Objects": [{"Key": key} for key in keys[i : i + 1000]],
+                "Quiet": True,
+            },
+        )
+
+
+def referenced_image_keys(db, book_id: int) -> set[str]:
+    """Ключи изображений, на которые ссылаются страницы книги"""
+    # в компактном формате изображения лежат в отдельном списке images,
+    # у страниц старого формата - среди элементов (у строк текста нет path)
+    elements = case(
+        (func.jsonb_typeof(PageORM.content) == "array", PageORM.content),
+        else_=PageORM.content["images"],
+    )
+    item = (
+        func.jsonb_array_elements(elements)
+        .table_valued(column("value", JSONB))
+        .render_derived(name="item")
+    )
+    query = (
+        select(item.c.value["path"].astext, item.c.value["variants"])
+        .select_from(PageORM)
+        .join(item, true())
+        .where(PageORM.book_id == book_id, item.c.value.has_key("path"))
+    )
+    keys = set()
+    for path, variants in db.session.execute(query):
+        keys.add(path)
+        keys.update(variant["path"] for variant in variants or [])
+    return keys
 
 
 @celery_app.task
 def delete_book_images(book_id: int):
     logging.info(f"Начинаю удаление книги (id={book_id})")
     with get_sync_session() as s3:
-        bucket_name = settings.S3_BUCKET_NAME
-        response = s3.client.list_objects_v2(
-            Prefix=f"books/{book_id}/images", Bucket=bucket_name
-        )
-        contents = response.get("Contents", [])
-        files = [file["Key"] for file in contents]
-        for key in files:
-            s3.client.delete_object(Bucket=bucket_name, Key=key)
+        for keys in iter_book_image_keys(s3, book_id):
+            delete_image_keys(s3, keys=keys)
 
 
 @celery_app.task
 def change_content(book_id: int):
-    delete_book_images(book_id)
-    render_book(book_id)
+    # Новый PDF рендерится с первой страницы. Изображения не удаляются заранее:
+    # совпадающие с прошлой версией не загружаются повторно,
+    # а оставшиеся без ссылок render_book удалит в конце
+    with get_sync_db_np() as db:
+        reset_checkpoint_stmt = (
+            update(BooksORM).filter_by(book_id=book_id).values(rendered_pages=0)
+        )
+        db.session.execute(reset_checkpoint_stmt)
+        db.commit()
+    render_book.delay(book_id)
 
 
 @celery_app.task(name="auto_statement")
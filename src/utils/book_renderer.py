@@ -0,0 +1,111 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Iterator
+
+import fitz
+from src.utils.helpers import PDFRenderer
+
+
+def render_page_range(pdf_path: str, book_id: int, start: int, stop: int):
+    """
+    Выполняется в дочернем процессе: разбирает страницы [start, stop).
+    Возвращает изображения и строки для таблицы Pages
+    """
+    with fitz.open(pdf_path) as doc:
+        images, pages = PDFRenderer.parse_page_range(
+            doc, book_id=book_id, start=start, stop=stop
+        )
+    return images, [page.model_dump() for page in pages]
+
+
+class ParallelBookRenderer:
+    """
+    Рендеринг книги пачками страниц в пуле процессов.
+
+    fitz упирается в CPU, поэтому диапазоны страниц разбираются параллельно
+    в workers процессах. Результаты отдаются по порядку, а в работе
+    одновременно не больше max_in_flight пачек - память ограничена
+    """
+
+    def __init__(
+        self,
+        pdf_path: str,
+        book_id: int,
+        workers: int = 4,
+        pages_per_chunk: int = 25,
+        max_in_flight: int | None = None,
+    ):
+        self.pdf_path = pdf_path
+        self.book_id = book_id
+        self.workers = workers
+        self.pages_per_chunk = pages_per_chunk
+        self.max_in_flight = max_in_flight or workers * 2
+
+    def page_ranges(
+        self, start: int, stop: int, priority_pages: int = 0
+    ) -> list[tuple[int, int]]:
+        """
+        Диапазоны страниц [start, stop) по pages_per_chunk.
+        Первые priority_pages страниц делятся между всеми процессами поровну,
+        чтобы книгу можно было начать читать как можно раньше
+        """
+        priority_stop = min(max(start, priority_pages), stop)
+        ranges = []
+        if start < priority_stop:
+            step = -(-(priority_stop - start) // self.workers)
+            ranges += [
+                (first, min(first + step, priority_stop))
+                for first in range(start, priority_stop, step)
+            ]
+        ranges += [
+            (first, min(first + self.pages_per_chunk, stop))
+            for first in range(priority_stop, stop, self.pages_per_chunk)
+        ]
+        return ranges
+
+    def iter_chunks(
+        self, start: int, stop: int, priority_pages: int = 0
+    ) -> Iterator[tuple[list[dict], list[dict]]]:
+        """Пачки (изображения, строки страниц) для страниц [start, stop) по порядку"""
+        # spawn: MuPDF и открытые соединения воркера не переживают fork
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        try:
+            in_flight = deque()
+            for first, last in self.page_ranges(start, stop, priority_pages):
+                in_flight.append(
+                    pool.submit(
+                        render_page_range, self.pdf_path, self.book_id, first, last
+                    )
+                )
+                if len(in_flight) >= self.max_in_flight:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+        finally:
+            # при ошибке не дорендериваем оставшиеся пачки
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def upload_images(
+    client, bucket_name: str, images: list[dict], executor, uploaded: set[str]
+):
+    """
+    Загружает изображения пачки параллельно и ждет окончания всех загрузок.
+    uploaded - ключи, которые уже лежат в S3: ключ зависит только от содержимого,
+    поэтому такие изображения (и повторы внутри пачки) не загружаются снова
+    """
+    to_upload = {}
+    for image in images:
+        if image["Key"] not in uploaded:
+            to_upload.setdefault(image["Key"], image["Body"])
+    futures = [
+        executor.submit(client.put_object, Bucket=bucket_name, Key=key, Body=body)
+        for key, body in to_upload.items()
+    ]
+    wait(futures)
+    for future in futures:
+        future.result()  # пробрасываем первую ошибку загрузки
+    uploaded.update(to_upload)
@@ -1,5 +1,7 @@
 from src.decorators.cache.base import BaseCacheManager
 from src.decorators.cache.books import BooksCacheManager
+from src.decorators.cache.catalogue import CatalogueCacheManager
+from src.decorators.cache.tags import invalidate_tags
 from src.connectors.redis_connector import redis_conn as redis
 
 
@@ -7,6 +9,12 @@ class CacheManager:
     def __init__(self, redis):
         self.base = BaseCacheManager(redis=redis).base_cache
         self.books = BooksCacheManager(redis=redis)
+        self.catalogue = CatalogueCacheManager(redis=redis)
+        self.redis = redis._redis
+
+    async def invalidate(self, *tags: str):
+        """Сбрасывает все записи кеша, помеченные любым из тегов"""
+        await invalidate_tags(self.redis, *tags)
 
 
 def get_cache_manager():
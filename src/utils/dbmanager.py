@@ -2,6 +2,7 @@ from sqlalchemy.ext.asyncio import async_sessionmaker
 from src.repositories.database.users import UsersRepository
 from src.repositories.database.books import (
     BooksRepository,
+    BookStatsRepository,
     GenresBooksRepository,
     TagRepository,
     GenreRepository,
@@ -49,6 +50,7 @@ class AsyncDBManager:
         self.reports = ReportsRepository(self.session)
         self.user_reads = UserBooksReadRepository(self.session)
         self.pages = PageRepository(self.session)
+        self.book_stats = BookStatsRepository(self.session)
 
         return self
 
@@ -1,111 +1,127 @@
+import base64
+import binascii
+import hashlib
+import io
+import json
+import math
 from pathlib import Path
 from typing import List, Tuple
 
 import aiofiles
+import orjson
+from PIL import Image, UnidentifiedImageError
+from src.config import settings
 from src.exceptions.books import PageNotFoundException
 from src.exceptions.conftest import DirectoryNotFoundException, ReadFileException
 from src.exceptions.files import FileNotFoundException
+from src.exceptions.search import InvalidCursorException
 from src.schemas.books import Page
+from src.utils.page_content import PageContentCodec
+
+
+class BookImageProcessor:
+    """
+    Перекодирует изображения книги в WebP нескольких ширин.
+
+    Ширины из widths, меньшие исходной, плюс исходная ширина (она же - path
+    по умолчанию). Одинаковые изображения обрабатываются один раз на процессор,
+    повторно возвращаются только ссылки на уже готовые варианты
+    """
+
+    def __init__(
+        self,
+        widths: list[int] = settings.RENDER_IMAGE_WIDTHS,
+        quality: int = settings.RENDER_IMAGE_QUALITY,
+    ):
+        self.widths = sorted(widths)
+        self.quality = quality
+        self._processed: dict[str, list[dict]] = {}
+
+    def process(self, book_id: int, image: bytes, ext: str):
+        """
+        Возвращает изображения для загрузки в S3 (только новые для процессора)
+        и варианты [{"width", "path"}] по возрастанию ширины
+        """
+        digest = hashlib.blake2b(image, digest_size=16).hexdigest()
+        if digest in self._processed:
+            return [], self._processed[digest]
+        try:
+            encoded = self._transcode(image)
+            suffix = "_w{width}.webp"
+        except (UnidentifiedImageError, OSError, ValueError):
+            # Pillow не умеет этот формат - храним как есть
+            encoded = [(None, image)]
+            suffix = f".{ext}"
+        images_to_save, variants = [], []
+        for width, body in encoded:
+            key = f"books/{book_id}/images/{digest}{suffix.format(width=width)}"
+            images_to_save.append({"Body": body, "Key": key})
+            variants.append({"width": width, "path": key})
+        self._processed[digest] = variants
+        return images_to_save, variants
+
+    def _transcode(self, image: bytes) -> list[tuple[int, bytes]]:
+        with Image.open(io.BytesIO(image)) as img:
+            has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+            img = img.convert("RGBA" if has_alpha else "RGB")
+        widths = [width for width in self.widths if width < img.width]
+        encoded = []
+        for width in [*widths, img.width]:
+            height = max(1, round(img.height * width / img.width))
+            resized = img if width == img.width else img.resize((width, height))
+            buffer = io.BytesIO()
+            resized.save(buffer, format="WEBP", quality=self.quality)
+            encoded.append((width, buffer.getvalue()))
+        return encoded
 
 
 class PDFRenderer:
     """Работа с файлами .pdf"""
 
     @staticmethod
-    def parse_images_and_text_from_pdf(doc, book_id: int):
+    def parse_page(
+        page,
+        page_number: int,
+        book_id: int,
+        image_processor: BookImageProcessor | None = None,
+    ):
+        """
+        Разбирает одну страницу (page_number считается с нуля).
+        Возвращает изображения для загрузки в S3 и контент страницы
+        """
+        image_processor = image_processor or BookImageProcessor()
         images_to_save = []
-        contents = []
-        for page_number, page in enumerate(doc):
-            page_content: list[dict[str, str]] = []
-            blocks = page.get_text("dict")["blocks"]
-            count_images = 0
-            for block in blocks:
-                if block["type"] == 0:
-                    for line in block.get("lines", []):
-                        line_text = ""
-                        for span in line.get("spans", []):
-                            line_text += span.get("text", "")
-                        if line_text.strip():
-                            page_content.append(
-                                {
-                                    "type": "text",
-                                    "content": line_text,  # сам текст
-                                    "size": span.get("size"),  # размер шрифта
-                                    "flags": span.get("flags"),  # флаги шрифта
-                                    "bidi": span.get(
-                                        "bidi"
-                                    ),  # уровень двунаправленного текста
-                                    "char_flags": span.get(
-                                        "char_flags"
-                                    ),  # флаги символов
-                                    "color": span.get(
-                                        "color"
-                                    ),  # цвет текста (в формате RGB)
-                                    "alpha": span.get("alpha"),  # прозрачность
-                                    "ascender": span.get(
-                                        "ascender"
-                                    ),  # высота восходящей части шрифта
-                                    "descender": span.get(
-                                        "descender"
-                                    ),  # высота нисходящей части шрифта
-                                    "origin": span.get(
-                                        "origin"
-                                    ),  # координаты начала (x, y)
-                                    "bbox": span.get("bbox"),
-                                }
-                            )
-                elif block["type"] == 1:
-                    xref = block.get("image") or block.get("image_ref")
-                    if xref is None:
-                        continue
-                    image_key = f"books/{book_id}/images/page_{page_number}_img_{count_images}.png"
-                    images_to_save.append({"Body": xref, "Key": image_key})
-                    page_content.append(
-                        {
-                            "type": "image",
-                            "path": image_key,
-                            "bbox": block.get("bbox"),
-                            "mask": block.get("mask"),
-                            "width": block.get("width"),
-                            "height": block.get("height"),
-                        }
-                    )
-                    count_images += 1
-            if page_content:
-                contents.append(
-                    Page(
-                        content=page_content,
-                        book_id=book_id,
-                        page_number=page_number + 1,
-                    )
-                )
-            else:
-                contents.append(
-                    Page(content="[]", book_id=book_id, page_number=page_number + 1)
-                )
-        return images_to_save, contents
-
-    @staticmethod
-    def parse_text_end_images_from_page(doc, page_number: int, book_id: int):
-        try:
-            page = doc.load_page(page_number - 1)
-        except ValueError as ex:
-            raise PageNotFoundException(page_number=page_number) from ex
+        page_content: list[dict[str, str]] = []
         blocks = page.get_text("dict")["blocks"]
-        content: list[dict[str, str]] = []
-        count_images = 0
         for block in blocks:
             if block["type"] == 0:
                 for line in block.get("lines", []):
                     line_text = ""
                     for span in line.get("spans", []):
                         line_text += span.get("text", "")
+                    # jsonb в Postgres не принимает NUL
+                    line_text = line_text.replace("\x00", "")
                     if line_text.strip():
-                        content.append(
+                        page_content.append(
                             {
                                 "type": "text",
                                 "content": line_text,  # сам текст
                                 "size": span.get("size"),  # размер шрифта
+                                "flags": span.get("flags"),  # флаги шрифта
+                                "bidi": span.get(
+                                    "bidi"
+                                ),  # уровень двунаправленного текста
+                                "char_flags": span.get("char_flags"),  # флаги символов
+                                "color": span.get(
+                                    "color"
+                                ),  # цвет текста (в формате RGB)
+                                "alpha": span.get("alpha"),  # прозрачность
+                                "ascender": span.get(
+                                    "ascender"
+                                ),  # высота восходящей части шрифта
+                                "descender": span.get(
+                                    "descender"
+                                ),  # высота нисходящей части шрифта
                                 "origin": span.get(
                                     "origin"
                                 ),  # координаты начала (x, y)
@@ -113,18 +129,69 @@ class PDFRenderer:
                             }
                         )
             elif block["type"] == 1:
-                content.append(
+                image = block.get("image")
+                if image is None:
+                    continue
+                # Ключи зависят от содержимого: одинаковые изображения книги
+                # (логотипы, орнаменты, фоны) хранятся в S3 один раз
+                new_images, variants = image_processor.process(
+                    book_id=book_id, image=image, ext=block.get("ext", "png")
+                )
+                images_to_save.extend(new_images)
+                page_content.append(
                     {
                         "type": "image",
-                        "path": f"books/{book_id}/images/page_{page_number - 1}_img_{count_images}.png",
+                        "path": variants[-1]["path"],  # самый большой вариант
+                        "variants": variants,
                         "bbox": block.get("bbox"),
                         "mask": block.get("mask"),
                         "width": block.get("width"),
                         "height": block.get("height"),
                     }
                 )
-                count_images += 1
-        return content
+        compact_content = PageContentCodec.encode(page_content)
+        return images_to_save, Page(
+            content=compact_content,
+            book_id=book_id,
+            page_number=page_number + 1,
+            content_hash=hashlib.blake2b(
+                orjson.dumps(compact_content), digest_size=16
+            ).hexdigest(),
+        )
+
+    @staticmethod
+    def parse_page_range(doc, book_id: int, start: int, stop: int):
+        """Разбирает страницы с start по stop - 1 (нумерация с нуля)"""
+        images_to_save = []
+        contents = []
+        image_processor = BookImageProcessor()
+        for page_number in range(start, stop):
+            images, page = PDFRenderer.parse_page(
+                doc.load_page(page_number),
+                page_number=page_number,
+                book_id=book_id,
+                image_processor=image_processor,
+            )
+            images_to_save.extend(images)
+            contents.append(page)
+        return images_to_save, contents
+
+    @staticmethod
+    def parse_images_and_text_from_pdf(doc, book_id: int):
+        return PDFRenderer.parse_page_range(
+            doc, book_id=book_id, start=0, stop=doc.page_count
+        )
+
+    @staticmethod
+    def parse_text_end_images_from_page(doc, page_number: int, book_id: int):
+        """Одна страница по номеру с единицы (рендеринг по запросу читателя)"""
+        try:
+            page = doc.load_page(page_number - 1)
+        except ValueError as ex:
+            raise PageNotFoundException(page_number=page_number) from ex
+        return PDFRenderer.parse_page(
+            page, page_number=page_number - 1, book_id=book_id
+        )
 
 
 class FileManager:
@@ -172,3 +239,54 @@ class TextFormatingManager:
     @staticmethod
     def replace_nbsp(text: str) -> str:
         return text.replace("\xa0", " ")
+
+
+class CursorManager:
+    """
+    Непрозрачный cursor для keyset-пагинации.
+    Хранит сортировку, значение сортируемого поля и id последней записи
+    """
+
+    @staticmethod
+    def encode(order_by: str, value: float | int | None, last_id: int) -> str:
+        raw = json.dumps({"o": order_by, "v": value, "id": last_id})
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    # Значения попадают в запрос как есть, поэтому ограничены типом
+    # и диапазоном колонок (иначе вместо 400 получим ошибку базы)
+    MAX_ID = 2**31 - 1
+    MAX_VALUE = 2**63 - 1
+
+    @staticmethod
+    def decode(
+        cursor: str, order_by: str, nullable_value: bool = True
+    ) -> tuple[float | int | None, int]:
+        """nullable_value=False - сортировка по значению, None в cursor недопустим"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            value, last_id = data["v"], data["id"]
+        except (binascii.Error, ValueError, TypeError, KeyError) as ex:
+            raise InvalidCursorException from ex
+        if data.get("o") != order_by:
+            # cursor был выдан для другой сортировки
+            raise InvalidCursorException
+        if (
+            not CursorManager._is_int(last_id)
+            or not 0 <= last_id <= CursorManager.MAX_ID
+        ):
+            raise InvalidCursorException
+        if value is None:
+            if not nullable_value:
+                raise InvalidCursorException
+        elif CursorManager._is_int(value):
+            if abs(value) > CursorManager.MAX_VALUE:
+                raise InvalidCursorException
+        elif not isinstance(value, float) or not math.isfinite(value):
+            raise InvalidCursorException
+        return value, last_id
+
+    @staticmethod
+    def _is_int(value) -> bool:
+        # bool - тоже int, но в cursor его быть не может
+        return isinstance(value, int) and not isinstance(value, bool)
@@ -0,0 +1,100 @@
+# Поля стиля строки текста - столбцы таблицы styles
+STYLE_FIELDS = (
+    "size",
+    "flags",
+    "bidi",
+    "char_flags",
+    "color",
+    "alpha",
+    "ascender",
+    "descender",
+)
+IMAGE_FIELDS = ("path", "variants", "bbox", "mask", "width", "height")
+COORD_PRECISION = 2  # знаков после запятой у координат и размеров
+
+
+def _round(value):
+    return round(value, COORD_PRECISION) if isinstance(value, float) else value
+
+
+class PageContentCodec:
+    """
+    Компактный формат контента страницы (версия 2).
+
+    Версия 1 - список элементов, у каждой строки текста около 12 ключей.
+    Версия 2 - словарь:
+    styles - таблица уникальных стилей строк (значения STYLE_FIELDS),
+    lines - столбцы строк: text, style (индекс в styles), origin (x, y подряд)
+    и bbox (x0, y0, x1, y1 подряд), числа округлены до COORD_PRECISION,
+    images - изображения, at - позиция изображения среди всех элементов.
+    decode разворачивает любую версию в список элементов (для старых клиентов)
+    """
+
+    VERSION = 2
+
+    @staticmethod
+    def is_compact(content) -> bool:
+        return isinstance(content, dict)
+
+    @staticmethod
+    def encode(items: list[dict]) -> dict:
+        styles: dict[tuple, int] = {}
+        text, style, origin, bbox = [], [], [], []
+        images = []
+        for position, item in enumerate(items):
+            if item["type"] == "image":
+                image = {"at": position}
+                for field in IMAGE_FIELDS:
+                    if field in item:
+                        image[field] = item[field]
+                if image.get("bbox"):
+                    image["bbox"] = [_round(value) for value in image["bbox"]]
+                images.append(image)
+                continue
+            key = tuple(_round(item.get(field)) for field in STYLE_FIELDS)
+            text.append(item["content"])
+            style.append(styles.setdefault(key, len(styles)))
+            origin.extend(_round(value) for value in item["origin"])
+            bbox.extend(_round(value) for value in item["bbox"])
+        return {
+            "v": PageContentCodec.VERSION,
+            "styles": [list(key) for key in styles],
+            "lines": {"text": text, "style": style, "origin": origin, "bbox": bbox},
+            "images": images,
+        }
+
+    @staticmethod
+    def decode(content) -> list[dict]:
+        if not PageContentCodec.is_compact(content):
+            return content  # версия 1 хранится уже развернутой
+        lines, styles = content["lines"], content["styles"]
+        text_items = (
+            {
+                "type": "text",
+                "content": line_text,
+                **dict(zip(STYLE_FIELDS, styles[line_style])),
+                "origin": lines["origin"][2 * i : 2 * i + 2],
+                "bbox": lines["bbox"][4 * i : 4 * i + 4],
+            }
+            for i, (line_text, line_style) in enumerate(
+                zip(lines["text"], lines["style"])
+            )
+        )
+        images = {image["at"]: image for image in content["images"]}
+        items = []
+        for position in range(len(lines["text"]) + len(images)):
+            if position in images:
+                image = images[position]
+                items.append(
+                    {"type": "image"}
+                    | {field: image[field] for field in IMAGE_FIELDS if field in image}
+                )
+            else:
+                items.append(next(text_items))
+        return items
+
+    @staticmethod
+    def to_compact(content) -> dict:
+        if PageContentCodec.is_compact(content):
+            return content
+        return PageContentCodec.encode(content)
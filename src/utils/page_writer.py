@@ -0,0 +1,46 @@
+import io
+from typing import Iterable
+
+import orjson
+
+# Колонки "Pages", которые пишет COPY (page_id берется из последовательности)
+PAGE_COPY_COLUMNS = ("book_id", "page_number", "content", "content_hash")
+PAGE_COPY_SQL = (
+    f'COPY "Pages" ({", ".join(PAGE_COPY_COLUMNS)}) FROM STDIN WITH (FORMAT text)'
+)
+
+
+# Разделители текстового формата COPY, которые нужно экранировать в значениях
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_value(value) -> str:
+    """Значение в текстовом формате COPY"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, (dict, list)):
+        value = orjson.dumps(value).decode()
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def page_copy_rows(pages: Iterable[dict]) -> str:
+    """Строки страниц (словари из рендеринга) для COPY FROM STDIN"""
+    return "".join(
+        "\t".join(_copy_value(page.get(column)) for column in PAGE_COPY_COLUMNS) + "\n"
+        for page in pages
+    )
+
+
+def copy_pages(db, pages: list[dict], chunk_size: int = 500):
+    """
+    Добавляет страницы через COPY пачками по chunk_size строк
+    (синхронная сессия psycopg2, Celery). Строки пишутся в той же
+    транзакции, что и остальные изменения сессии
+    """
+    cursor = db.session.connection().connection.cursor()
+    try:
+        for first in range(0, len(pages), chunk_size):
+            buffer = io.StringIO(page_copy_rows(pages[first : first + chunk_size]))
+            cursor.copy_expert(PAGE_COPY_SQL, buffer)
+    finally:
+        cursor.close()
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from collections import Counter
+
+from src.config import settings
+from src.context.database import get_db_as_context_manager
+
+
+class ReadingProgressBuffer:
+    """
+    Отложенная запись прогресса чтения (write-behind).
+
+    Просмотр страницы только запоминает последнюю страницу для пары
+    (пользователь, книга), а в базу прогресс уходит пачкой:
+    раз в flush_interval_ms или при накоплении max_entries записей.
+    При остановке приложения буфер сбрасывается целиком
+    """
+
+    def __init__(self, flush_interval_ms: int, max_entries: int, db_factory=None):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_entries = max_entries
+        self._db_factory = db_factory or get_db_as_context_manager
+        self._pending: dict[tuple[int, int], int] = {}
+        self._flush_lock = asyncio.Lock()
+        self._worker: asyncio.Task | None = None
+        # Сброс по переполнению: одновременно запущен не больше одного
+        self._background_flush: asyncio.Task | None = None
+
+    def add(self, user_id: int, book_id: int, page_number: int) -> None:
+        # Для пары важна только последняя открытая страница
+        self._pending[(user_id, book_id)] = page_number
+        if len(self._pending) >= self.max_entries and (
+            self._background_flush is None or self._background_flush.done()
+        ):
+            self._background_flush = asyncio.create_task(self.flush())
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            rows = [
+                {"user_id": user_id, "book_id": book_id, "last_seen_page": page}
+                for (user_id, book_id), page in pending.items()
+            ]
+            try:
+                async with self._db_factory() as db:
+                    new_reader_book_ids = await db.user_reads.upsert_progress(rows)
+                    for book_id, count in Counter(new_reader_book_ids).items():
+                        await db.book_stats.add_reader(book_id=book_id, count=count)
+                    await db.commit()
+            except Exception as ex:
+                logging.exception(ex)
+                # Возвращаем записи в буфер, не затирая более свежие
+                for key, page in pending.items():
+                    self._pending.setdefault(key, page)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._background_flush is not None:
+            await asyncio.gather(self._background_flush, return_exceptions=True)
+            self._background_flush = None
+        await self.flush()
+
+
+progress_buffer = ReadingProgressBuffer(
+    flush_interval_ms=settings.PROGRESS_FLUSH_INTERVAL_MS,
+    max_entries=settings.PROGRESS_FLUSH_MAX_ENTRIES,
+)
@@ -0,0 +1,25 @@
+# Страницы, которые читатели запросили до того, как до них дошел рендеринг.
+# API кладет номер страницы в сет, render_book забирает его между пачками
+# и рендерит такие страницы вне очереди
+
+# Запросы, которые некому обработать (рендеринг упал), не копятся вечно
+RENDER_REQUESTS_TTL = 60 * 60
+
+
+def requested_pages_key(book_id: int) -> str:
+    return f"render:requested_pages:{book_id}"
+
+
+async def request_page_render(redis, book_id: int, page_number: int):
+    key = requested_pages_key(book_id)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.sadd(key, page_number)
+        pipe.expire(key, RENDER_REQUESTS_TTL)
+        await pipe.execute()
+
+
+def pop_requested_pages(redis, book_id: int, count: int = 100) -> list[int]:
+    """Забирает из сета (синхронный клиент, Celery) до count номеров страниц"""
+    return sorted(
+        int(number) for number in redis.spop(requested_pages_key(book_id), count)
+    )
@@ -1,3 +1,4 @@
+import asyncio
 from aiobotocore.session import get_session as async_get_session
 from aiobotocore.config import AioConfig
 from botocore.session import get_session as sync_get_session
@@ -13,13 +14,20 @@ class AsyncS3Client:
         secret_key: str,
         endpoint_url: str,
         region_name: str,
+        max_pool_connections: int = 10,
+        keepalive_timeout: int = 60,
     ):
         self.config = {
             "aws_access_key_id": access_key,
             "aws_secret_access_key": secret_key,
             "endpoint_url": endpoint_url,
             "region_name": region_name,
-            "config": AioConfig(s3={"addressing_style": "virtual"}),
+            "config": AioConfig(
+                s3={"addressing_style": "virtual"},
+                max_pool_connections=max_pool_connections,
+                tcp_keepalive=True,
+                connector_args={"keepalive_timeout": keepalive_timeout},
+            ),
         }
         self.session = async_get_session()
 
@@ -35,6 +43,35 @@ class AsyncS3Client:
         await self.client.close()
 
 
+class AsyncS3ClientPool:
+    """
+    Один долгоживущий клиент S3 на все приложение.
+
+    Пул соединений, TLS-сессии и учетные данные переиспользуются
+    между запросами. Клиент открывается в lifespan приложения
+    (или при первом запросе) и закрывается при остановке
+    """
+
+    def __init__(self, client: AsyncS3Client):
+        self._client = client
+        self._is_open = False
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> AsyncS3Client:
+        if not self._is_open:
+            async with self._lock:
+                if not self._is_open:
+                    await self._client.__aenter__()
+                    self._is_open = True
+        return self._client
+
+    async def close(self):
+        async with self._lock:
+            if self._is_open:
+                await self._client.__aexit__(None, None, None)
+                self._is_open = False
+
+
 class SyncS3Client:
     """Класс, предназначенный исключительно для Celery. Не использовать в бизнес логике!"""
 
@@ -44,13 +81,17 @@ class SyncS3Client:
         secret_key: str,
         endpoint_url: str,
         region_name: str,
+        max_pool_connections: int = 10,
     ):
         self.config = {
             "aws_access_key_id": access_key,
             "aws_secret_access_key": secret_key,
             "endpoint_url": endpoint_url,
             "region_name": region_name,
-            "config": Config(s3={"addressing_style": "virtual"}),
+            "config": Config(
+                s3={"addressing_style": "virtual"},
+                max_pool_connections=max_pool_connections,
+            ),
         }
         self.session = sync_get_session()
 
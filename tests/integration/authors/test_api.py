@@ -168,7 +168,12 @@ async def test_add_already_exist_content(
 ):
     author_client, book = authorized_client_with_new_book
 
-    list_images = [f"books/{book.book_id}/images/page_0_img_0.png"]
+    # ключ изображения - хеш его содержимого, изображение хранится
+    # в WebP нескольких ширин (исходная ширина - 1027)
+    list_images = [
+        f"books/{book.book_id}/images/d158d00967cd4e220b7a347c7228676f_w{width}.webp"
+        for width in (1027, 320, 640)
+    ]
     file_path = "books/content/test_book.pdf"
     file, filename = await ServiceForTests.get_file_and_name(file_path)
 
@@ -186,6 +191,15 @@ async def test_add_already_exist_content(
     assert all_images == list_images
     assert book.is_rendered
 
+    # чекпоинт рендеринга дошел до последней страницы
+    response_get_status = await author_client.get(
+        f"/author/{book.book_id}/publication_status"
+    )
+    assert response_get_status.json() == {
+        "render_status": "ready",
+        "rendered_pages": book.total_pages,
+    }
+
     # добавляем контент к книге, у которой он уже есть
     response_add_content_again = await author_client.post(
         url=f"/author/content/{book.book_id}", files={"file": (filename, file)}
@@ -193,6 +207,53 @@ async def test_add_already_exist_content(
     assert response_add_content_again.status_code == 409
 
 
+async def test_edit_content_rewrites_only_changed_pages(
+    authorized_client_with_new_book, db, s3
+):
+    author_client, book = authorized_client_with_new_book
+    file, filename = await ServiceForTests.get_file_and_name(
+        "books/content/test_book.pdf"
+    )
+    response_add_content = await author_client.post(
+        url=f"/author/content/{book.book_id}", files={"file": (filename, file)}
+    )
+    assert response_add_content.status_code == 200
+    old_pages = {
+        page.page_number: page
+        for page in await db.pages.get_filtered(book_id=book.book_id)
+    }
+
+    # тот же файл: ни одна страница не перезаписывается
+    response_edit_content = await author_client.put(
+        url=f"/author/content/{book.book_id}", files={"file": (filename, file)}
+    )
+    assert response_edit_content.status_code == 200
+    pages = await db.pages.get_filtered(book_id=book.book_id)
+    assert {page.page_number: page for page in pages} == old_pages
+
+    # другая книга: лишние страницы удалены, изображения без ссылок тоже
+    file, filename = await ServiceForTests.get_file_and_name(
+        "books/content/test_book_2.pdf"
+    )
+    response_edit_content = await author_client.put(
+        url=f"/author/content/{book.book_id}", files={"file": (filename, file)}
+    )
+    assert response_edit_content.status_code == 200
+    pages = await db.pages.get_filtered(book_id=book.book_id)
+    assert sorted(page.page_number for page in pages) == [1, 2, 3, 4]
+    assert all(page.content_hash for page in pages)
+    referenced = {
+        variant["path"]
+        for page in pages
+        for item in page.content["images"]
+        for variant in item["variants"]
+    }
+    all_images = await s3.books.list_objects_by_prefix(
+        prefix=f"books/{book.book_id}/images"
+    )
+    assert set(all_images) == referenced
+
+
 async def test_add_not_book(authorized_client_with_new_book, db, s3):
     author_client, book = authorized_client_with_new_book
     file_path = "books/content/not_a_book.jpg"
@@ -240,7 +301,8 @@ async def test_add_already_exists_content(
         prefix=f"books/{book.book_id}/images"
     )
     book = await db.books.get_one(book_id=book.book_id)
-    assert len(all_images) == images_count
+    # у каждого изображения несколько вариантов с общим хешем в имени
+    assert len({key.split("/")[-1].split("_")[0] for key in all_images}) == images_count
     assert book.is_rendered
 
 
@@ -1,4 +1,10 @@
 import pytest
+from src.connectors.redis_connector import redis_conn
+from src.enums.books import RenderStatus
+from src.schemas.books import BookEditRenderStatus, BookPATCH
+from src.utils.page_content import PageContentCodec
+from src.utils.progress_buffer import progress_buffer
+from src.utils.render_requests import requested_pages_key
 
 
 @pytest.mark.parametrize(
@@ -40,11 +46,80 @@ async def test_get_book_with_cover(ac, new_publicated_book_with_cover):
     assert response_search.status_code == 200
 
 
+async def test_full_text_search(ac, db, auth_new_author):
+    response_add = await auth_new_author.post(
+        url="/author/book",
+        json={
+            "title": "Приключения капитана Врунгеля",
+            "age_limit": 6,
+            "description": "Морская повесть о кругосветном плавании",
+            "language": "Russian",
+            "genres": [(await db.genres.get_all())[0].genre_id],
+            "tags": ["яхта"],
+        },
+    )
+    assert response_add.status_code == 200
+    book_id = response_add.json()["book_id"]
+    await db.books.edit(BookPATCH(is_publicated=True), is_patch=True, book_id=book_id)
+    await db.commit()
+
+    # слово из описания, тег и название с опечаткой
+    for q in ["кругосветном", "яхта", "капитана Врунгеля", "Врунгиля"]:
+        response = await ac.get("/books", params={"q": q, "per_page": 39})
+        assert response.status_code == 200
+        assert book_id in [book["book_id"] for book in response.json()], q
+
+    response = await ac.get("/books", params={"q": "несуществующееслово"})
+    assert response.status_code == 200
+    assert book_id not in [book["book_id"] for book in response.json()]
+
+
+async def test_get_with_cursor(ac, new_publicated_book, new_publicated_book_with_cover):
+    # Проходим по всем книгам через cursor и проверяем, что они не повторяются
+    seen_ids = []
+    params = {"per_page": 1}
+    for _ in range(100):
+        response = await ac.get("/books/cursor", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        seen_ids.extend(book["book_id"] for book in page["books"])
+        if page["next_cursor"] is None:
+            break
+        params["cursor"] = page["next_cursor"]
+    assert len(seen_ids) == len(set(seen_ids))
+    assert seen_ids == sorted(seen_ids)
+    assert new_publicated_book.book_id in seen_ids
+
+    # cursor, выданный для другой сортировки, не принимается
+    response = await ac.get("/books/cursor", params={"per_page": 1})
+    cursor = response.json()["next_cursor"]
+    response = await ac.get(
+        "/books/cursor", params={"cursor": cursor, "order_by": "rating"}
+    )
+    assert response.status_code == 400
+
+    response = await ac.get("/books/cursor", params={"cursor": "не cursor"})
+    assert response.status_code == 400
+
+
 async def test_get_all_genres(ac, seed_genres):
     response = await ac.get("/books/genres")
     assert response.status_code == 200
     assert response.json()
 
+    # клиент с актуальной копией списка получает 304 без тела
+    etag = response.headers["etag"]
+    response = await ac.get("/books/genres", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert not response.content
+
+
+async def test_get_all_reasons(ac, new_reason):
+    response = await ac.get("/books/reasons")
+    assert response.status_code == 200
+    assert new_reason.reason_id in [reason["reason_id"] for reason in response.json()]
+    assert response.headers["etag"]
+
 
 async def test_download_book(ac2, authorized_client_new_book_with_content):
     _, book = authorized_client_new_book_with_content
@@ -70,7 +145,7 @@ async def test_get_book_with_rels(ac, new_book):
 
 
 async def test_get_book_page(
-    auth_new_second_user, authorized_client_new_book_with_content
+    auth_new_second_user, authorized_client_new_book_with_content, db
 ):
     # (контент взят из локального books/content/test_book_2.pdf)
     _, book = authorized_client_new_book_with_content
@@ -84,6 +159,36 @@ async def test_get_book_page(
     response_get_page = await auth_new_second_user.get(f"books/{book.book_id}/page/2")
     assert response_get_page.status_code == 200
     assert response_get_page.json()
+    images = [item for item in response_get_page.json() if item["type"] == "image"]
+    # вместо путей в S3 отдаются подписанные ссылки
+    assert images
+    assert all(image["path"].startswith("http") for image in images)
+    # варианты разной ширины тоже подписаны
+    for image in images:
+        assert [variant["width"] for variant in image["variants"]] == sorted(
+            variant["width"] for variant in image["variants"]
+        )
+        assert all(variant["path"].startswith("http") for variant in image["variants"])
+
+    # компактный формат разворачивается в тот же список элементов
+    response_get_compact = await auth_new_second_user.get(
+        f"books/{book.book_id}/page/2", params={"compact": True}
+    )
+    assert response_get_compact.status_code == 200
+    compact = response_get_compact.json()
+    assert compact["v"] == PageContentCodec.VERSION
+    assert all(image["path"].startswith("http") for image in compact["images"])
+    assert [item["type"] for item in PageContentCodec.decode(compact)] == [
+        item["type"] for item in response_get_page.json()
+    ]
+
+    # прогресс чтения обновляется в той же строке, читатель считается один раз
+    await progress_buffer.flush()
+    user_reads = await db.user_reads.get_filtered(book_id=book.book_id)
+    assert len(user_reads) == 1
+    assert user_reads[0].last_seen_page == 2
+    stats = await db.book_stats.get_one(book_id=book.book_id)
+    assert stats.readers == 1
 
     # пытаемся получить несуществующую страницу
     response_get_page = await auth_new_second_user.get(
@@ -98,6 +203,41 @@ async def test_get_book_page(
     assert response_get_page.json()
 
 
+async def test_get_page_while_rendering(
+    auth_new_second_user, authorized_client_new_book_with_content, db
+):
+    _, book = authorized_client_new_book_with_content
+    # книга еще дорендеривается, а до третьей страницы очередь не дошла
+    await db.pages.delete(book_id=book.book_id, page_number=3)
+    await db.books.edit(
+        data=BookEditRenderStatus(render_status=RenderStatus.RENDERING),
+        book_id=book.book_id,
+    )
+    await db.commit()
+
+    response_get_page = await auth_new_second_user.get(f"books/{book.book_id}/page/3")
+    assert response_get_page.status_code == 503
+    assert response_get_page.headers["Retry-After"]
+    # страница поставлена в очередь на рендеринг вне очереди
+    requested = await redis_conn._redis.smembers(requested_pages_key(book.book_id))
+    assert requested == {b"3"}
+
+    # готовые страницы отдаются как обычно
+    response_get_page = await auth_new_second_user.get(f"books/{book.book_id}/page/1")
+    assert response_get_page.status_code == 200
+
+    # повторы рендеринга исчерпаны (FAILED): страницы уже не будет
+    await redis_conn._redis.delete(requested_pages_key(book.book_id))
+    await db.books.edit(
+        data=BookEditRenderStatus(render_status=RenderStatus.FAILED),
+        book_id=book.book_id,
+    )
+    await db.commit()
+    response_get_page = await auth_new_second_user.get(f"books/{book.book_id}/page/3")
+    assert response_get_page.status_code == 404
+    assert not await redis_conn._redis.exists(requested_pages_key(book.book_id))
+
+
 async def test_get_page_from_book_without_content(new_book, auth_new_second_user):
     response_get_page = await auth_new_second_user.get(
         f"books/{new_book.book_id}/page/1"
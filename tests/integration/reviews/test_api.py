@@ -102,7 +102,38 @@ async def test_get_book_reviews(ac, db, new_review):
     book_reviews_reponse = await ac.get(url=f"reviews/by_book/{new_review.book_id}")
     book_reviews_json = book_reviews_reponse.json()
     assert book_reviews_reponse.status_code == 200
-    assert len(book_reviews_json) == len(book_reviews_in_db)
+    assert len(book_reviews_json["reviews"]) == len(book_reviews_in_db)
+    assert book_reviews_json["next_cursor"] is None
+
+
+async def test_get_book_reviews_with_cursor(ac, new_review, auth_new_second_admin):
+    # админ может оставить несколько отзывов на одну книгу
+    for rating in range(1, 4):
+        response_add = await auth_new_second_admin.post(
+            url=f"/reviews/by_book/{new_review.book_id}",
+            json={"rating": rating, "text": "Отзыв для проверки пагинации"},
+        )
+        assert response_add.status_code == 200
+
+    seen_ids = []
+    params = {"limit": 1}
+    for _ in range(10):
+        response = await ac.get(f"reviews/by_book/{new_review.book_id}", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["reviews"]) <= 1
+        seen_ids.extend(review["review_id"] for review in page["reviews"])
+        if page["next_cursor"] is None:
+            break
+        params["cursor"] = page["next_cursor"]
+    # от новых к старым и без повторов
+    assert len(seen_ids) == 4
+    assert seen_ids == sorted(seen_ids, reverse=True)
+
+    response = await ac.get(
+        f"reviews/by_book/{new_review.book_id}", params={"cursor": "не cursor"}
+    )
+    assert response.status_code == 400
 
 
 async def test_check_rate_yourself(authorized_client_with_new_book):
@@ -142,3 +173,28 @@ async def test_admin_edit_alian_reviews(auth_new_second_admin, new_review, db):
     assert response_delete_as_admin.status_code == 200
     deleted_review_in_db = await db.reviews.get_filtered(review_id=new_review.review_id)
     assert not deleted_review_in_db
+
+
+async def test_book_stats_follow_reviews(ac, db, new_review_with_author_ac):
+    author_client, review = new_review_with_author_ac
+
+    # после добавления отзыва рейтинг книги равен его оценке
+    response_get_book = await ac.get(f"books/{review.book_id}")
+    assert response_get_book.status_code == 200
+    assert response_get_book.json()["avg_rating"] == review.rating
+
+    # изменение оценки пересчитывает рейтинг
+    response_edit = await author_client.put(
+        url=f"/reviews/{review.review_id}",
+        json={"rating": 1, "text": "Передумал"},
+    )
+    assert response_edit.status_code == 200
+    stats = await db.book_stats.get_one(book_id=review.book_id)
+    assert stats.rating_sum == 1
+    assert stats.rating_count == 1
+
+    # после удаления единственного отзыва рейтинга у книги нет
+    response_delete = await author_client.delete(url=f"/reviews/{review.review_id}")
+    assert response_delete.status_code == 200
+    response_get_book = await ac.get(f"books/{review.book_id}")
+    assert response_get_book.json()["avg_rating"] is None
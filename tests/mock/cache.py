@@ -1,6 +1,23 @@
 from typing import Callable
+from src.decorators.cache.codecs import default_codec
 
 
-async def fake_cache_by_key(redis, key: str, ttl: int, func: Callable, *args, **kwargs):
+async def fake_cache_by_key(
+    redis,
+    key: str,
+    ttl: int,
+    func: Callable,
+    *args,
+    local=None,
+    lock=False,
+    raw=False,
+    codec=default_codec,
+    tags=None,
+    db_factory=None,
+    **kwargs,
+):
     """Мокируем функцию cache_by_key()"""
-    return await func(*args, **kwargs)
+    res = await func(*args, **kwargs)
+    if raw:
+        return codec.to_json(codec.encode(res))
+    return res
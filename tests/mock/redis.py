@@ -0,0 +1,46 @@
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def setex(self, name, time, value):
+        self.commands.append(lambda: self.redis.data.__setitem__(name, value))
+
+    def sadd(self, name, *values):
+        self.commands.append(
+            lambda: self.redis.data.setdefault(name, set()).update(values)
+        )
+
+    def expire(self, name, time):
+        self.commands.append(lambda: None)
+
+    async def execute(self):
+        return [command() for command in self.commands]
+
+
+class FakeRedis:
+    """Redis в памяти: только команды, которые использует кеш (без TTL)"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, name):
+        return self.data.get(name)
+
+    async def smembers(self, name):
+        return set(self.data.get(name, set()))
+
+    async def delete(self, *names):
+        return sum(self.data.pop(name, None) is not None for name in names)
+
+    async def publish(self, channel, message):
+        return 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
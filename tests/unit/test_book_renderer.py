@@ -0,0 +1,131 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz
+from PIL import Image
+from src.utils.book_renderer import ParallelBookRenderer, upload_images
+from src.utils.helpers import BookImageProcessor, PDFRenderer
+
+PDF_PATH = "src/static/books/content/test_book.pdf"
+
+
+def test_page_ranges():
+    renderer = ParallelBookRenderer(PDF_PATH, book_id=1, pages_per_chunk=5)
+    assert renderer.page_ranges(0, 12) == [(0, 5), (5, 10), (10, 12)]
+    assert renderer.page_ranges(3, 3) == []
+
+
+def test_page_ranges_with_priority_pages():
+    renderer = ParallelBookRenderer(PDF_PATH, book_id=1, workers=4, pages_per_chunk=5)
+    # первые страницы делятся между всеми процессами
+    assert renderer.page_ranges(0, 17, priority_pages=10) == [
+        (0, 3),
+        (3, 6),
+        (6, 9),
+        (9, 10),
+        (10, 15),
+        (15, 17),
+    ]
+    # после чекпоинта за первыми страницами приоритет уже не нужен
+    assert renderer.page_ranges(12, 17, priority_pages=10) == [(12, 17)]
+    assert renderer.page_ranges(0, 4, priority_pages=10) == [
+        (0, 1),
+        (1, 2),
+        (2, 3),
+        (3, 4),
+    ]
+
+
+def test_render_single_page_matches_full_render():
+    with fitz.open(PDF_PATH) as doc:
+        images, pages = PDFRenderer.parse_images_and_text_from_pdf(doc, book_id=1)
+        page_images, page = PDFRenderer.parse_text_end_images_from_page(
+            doc, page_number=1, book_id=1
+        )
+    assert page == pages[0]
+    assert [image["Key"] for image in page_images] == [
+        variant["path"]
+        for item in page.content["images"]
+        for variant in item["variants"]
+    ]
+
+
+def test_page_content_hash():
+    with fitz.open(PDF_PATH) as doc:
+        _, pages = PDFRenderer.parse_images_and_text_from_pdf(doc, book_id=1)
+        _, same_pages = PDFRenderer.parse_images_and_text_from_pdf(doc, book_id=1)
+    # хеш зависит только от контента страницы
+    assert [page.content_hash for page in pages] == [
+        page.content_hash for page in same_pages
+    ]
+    assert len({page.content_hash for page in pages}) == len(
+        {str(page.content) for page in pages}
+    )
+
+
+def test_image_processor_variants():
+    buffer = io.BytesIO()
+    Image.new("RGB", (1000, 500), "red").save(buffer, format="PNG")
+    processor = BookImageProcessor(widths=[320, 640, 1280], quality=80)
+
+    images, variants = processor.process(book_id=1, image=buffer.getvalue(), ext="png")
+    # ширины меньше исходной плюс сама исходная
+    assert [variant["width"] for variant in variants] == [320, 640, 1000]
+    assert [image["Key"] for image in images] == [v["path"] for v in variants]
+    for image, variant in zip(images, variants):
+        assert image["Key"].endswith(f"_w{variant['width']}.webp")
+        with Image.open(io.BytesIO(image["Body"])) as img:
+            assert img.format == "WEBP"
+            assert img.size == (variant["width"], variant["width"] // 2)
+
+    # то же изображение еще раз не перекодируется
+    assert processor.process(book_id=1, image=buffer.getvalue(), ext="png") == (
+        [],
+        variants,
+    )
+
+    # то, что Pillow не открывает, хранится как есть
+    images, variants = processor.process(book_id=1, image=b"not an image", ext="jbig2")
+    assert images[0]["Body"] == b"not an image"
+    assert variants == [{"width": None, "path": images[0]["Key"]}]
+    assert images[0]["Key"].endswith(".jbig2")
+
+
+def test_upload_images_skips_duplicates():
+    class RecordingClient:
+        def __init__(self):
+            self.keys = []
+
+        def put_object(self, Bucket, Key, Body):
+            self.keys.append(Key)
+
+    client = RecordingClient()
+    images = [
+        {"Key": "books/1/images/a.png", "Body": b"a"},
+        {"Key": "books/1/images/b.png", "Body": b"b"},
+        {"Key": "books/1/images/a.png", "Body": b"a"},
+    ]
+    uploaded = {"books/1/images/b.png"}  # уже лежит в S3
+    with ThreadPoolExecutor(2) as executor:
+        upload_images(client, "bucket", images, executor=executor, uploaded=uploaded)
+        upload_images(client, "bucket", images, executor=executor, uploaded=uploaded)
+    assert client.keys == ["books/1/images/a.png"]
+    assert uploaded == {"books/1/images/a.png", "books/1/images/b.png"}
+
+
+def test_parallel_render_matches_serial():
+    with fitz.open(PDF_PATH) as doc:
+        num_pages = doc.page_count
+        images, pages = PDFRenderer.parse_images_and_text_from_pdf(doc, book_id=1)
+
+    renderer = ParallelBookRenderer(
+        PDF_PATH, book_id=1, workers=2, pages_per_chunk=3, max_in_flight=2
+    )
+    parallel_images, parallel_pages = [], []
+    for chunk_images, chunk_pages in renderer.iter_chunks(start=0, stop=num_pages):
+        parallel_images.extend(chunk_images)
+        parallel_pages.extend(chunk_pages)
+
+    # пачки приходят по порядку страниц
+    assert parallel_pages == [page.model_dump() for page in pages]
+    assert parallel_images == images
@@ -0,0 +1,122 @@
+import asyncio
+
+from src.decorators.cache.local import LocalCache
+from src.decorators.cache.codecs import CompressedCodec, OrjsonCodec
+from src.decorators.cache.utils import (
+    CachedValue,
+    _single_flight,
+    cache_by_key,
+    dump_cached,
+    load_cached,
+    should_refresh_early,
+)
+from src.decorators.cache.tags import CacheTags, invalidate_tags
+from src.schemas.books import Genre
+from tests.mock.redis import FakeRedis
+
+
+def test_local_cache_lru_and_size():
+    cache = LocalCache(max_entries=2, max_bytes=100, ttl=60)
+    cache.set("a", 1, size=10, ttl=60)
+    cache.set("b", 2, size=10, ttl=60)
+    # "a" становится самым свежим, вытесняется "b"
+    assert cache.get("a") == (True, 1)
+    cache.set("c", 3, size=10, ttl=60)
+    assert cache.get("b") == (False, None)
+    assert cache.get("c") == (True, 3)
+
+    # по размеру вытесняются старые записи, слишком большие не кешируются
+    cache.set("d", 4, size=95, ttl=60)
+    assert cache.get("a") == (False, None)
+    assert cache.get("d") == (True, 4)
+    cache.set("e", 5, size=101, ttl=60)
+    assert cache.get("e") == (False, None)
+
+
+def test_local_cache_ttl_and_invalidation():
+    cache = LocalCache(max_entries=10, max_bytes=100, ttl=60)
+    cache.set("expired", 1, size=1, ttl=0)
+    assert cache.get("expired") == (False, None)
+
+    cache.set("page:1", 1, size=1, ttl=60, tags=["book_pages:1", "books"])
+    cache.set("page:2", 2, size=1, ttl=60, tags=["book_pages:2", "books"])
+    cache.invalidate_tags(["book_pages:1"])
+    assert cache.get("page:1") == (False, None)
+    assert cache.get("page:2") == (True, 2)
+
+    # общий тег сбрасывает все записи, размер кеша пересчитывается
+    cache.invalidate_tags(["books"])
+    assert cache.get("page:2") == (False, None)
+    assert cache._size == 0
+
+
+async def test_single_flight():
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    # одновременные промахи по одному ключу вычисляются один раз
+    results = await asyncio.gather(*[_single_flight("key", compute) for _ in range(10)])
+    assert calls == 1
+    assert results == [1] * 10
+
+    # после завершения следующий промах снова вычисляет значение
+    assert await _single_flight("key", compute) == 2
+
+
+def test_cached_value_format():
+    payload = dump_cached(CachedValue(data=b"[1]", delta=0.5, expires_at=1))
+    cached = load_cached(payload)
+    assert cached.data == b"[1]"
+    assert should_refresh_early(cached.delta, cached.expires_at)
+
+
+def test_cache_codec():
+    genre = Genre(genre_id=1, title="Фантастика")
+    codec = CompressedCodec(OrjsonCodec(), min_size=100)
+
+    # pydantic-модели сохраняются как JSON, маленькие значения не сжимаются
+    data = codec.encode([genre])
+    assert codec.decode(data) == [genre.model_dump()]
+    assert codec.to_json(data) == '[{"genre_id":1,"title":"Фантастика"}]'.encode()
+
+    # большие значения сжимаются, но отдаются тем же JSON
+    genres = [genre] * 100
+    data = codec.encode(genres)
+    assert len(data) < len(codec.codec.encode(genres))
+    assert codec.to_json(data) == codec.codec.encode(genres)
+
+
+async def test_review_invalidation_drops_only_tagged_entries():
+    redis = FakeRedis()
+    calls = []
+
+    async def get_value(name: str):
+        calls.append(name)
+        return {"name": name}
+
+    async def cached(key: str, tags: list[str]):
+        return await cache_by_key(
+            redis=redis, key=key, ttl=60, func=get_value, tags=tags, name=key
+        )
+
+    book_tags = [CacheTags.BOOKS, CacheTags.book(1)]
+    other_book_tags = [CacheTags.BOOKS, CacheTags.book(2)]
+    listing_tags = [CacheTags.BOOKS, CacheTags.BOOK_LISTINGS]
+    await cached("book_1", book_tags)
+    await cached("book_2", other_book_tags)
+    await cached("books", listing_tags)
+    assert calls == ["book_1", "book_2", "books"]
+
+    # изменение отзыва на книгу 1
+    await invalidate_tags(redis, CacheTags.book(1), CacheTags.BOOK_LISTINGS)
+
+    await cached("book_1", book_tags)
+    await cached("book_2", other_book_tags)
+    await cached("books", listing_tags)
+    # пересчитаны карточка книги 1 и список, карточка книги 2 осталась в кеше
+    assert calls == ["book_1", "book_2", "books", "book_1", "books"]
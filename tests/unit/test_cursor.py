@@ -0,0 +1,30 @@
+import pytest
+from src.exceptions.search import InvalidCursorException
+from src.utils.helpers import CursorManager
+
+
+def test_cursor_roundtrip():
+    cursor = CursorManager.encode(order_by="rating", value=4.5, last_id=7)
+    assert CursorManager.decode(cursor, order_by="rating") == (4.5, 7)
+    cursor = CursorManager.encode(order_by="book_id", value=None, last_id=7)
+    assert CursorManager.decode(cursor, order_by="book_id") == (None, 7)
+
+
+@pytest.mark.parametrize(
+    "value, last_id",
+    [
+        ("5", 7),  # значение не число
+        ([1, 2], 7),
+        (True, 7),
+        (None, 7),  # сортировка по рейтингу без значения
+        (2**80, 7),
+        (4.5, "7"),  # id не целое число
+        (4.5, 7.5),
+        (4.5, -1),
+        (4.5, 2**40),
+    ],
+)
+def test_cursor_rejects_crafted_values(value, last_id):
+    cursor = CursorManager.encode(order_by="rating", value=value, last_id=last_id)
+    with pytest.raises(InvalidCursorException):
+        CursorManager.decode(cursor, order_by="rating", nullable_value=False)
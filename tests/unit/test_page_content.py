@@ -0,0 +1,97 @@
+import fitz
+import orjson
+from src.utils.helpers import PDFRenderer
+from src.utils.page_content import PageContentCodec
+from src.utils.page_writer import page_copy_rows
+
+PDF_PATH = "src/static/books/content/test_book_2.pdf"
+
+
+def test_decode_restores_items():
+    items = [
+        {
+            "type": "text",
+            "content": "Первая строка",
+            "size": 11.00432,
+            "flags": 4,
+            "bidi": 0,
+            "char_flags": 16,
+            "color": 0,
+            "alpha": 255,
+            "ascender": 0.891,
+            "descender": -0.216,
+            "origin": [56.692913, 81.274],
+            "bbox": [56.692913, 71.4913, 132.40123, 83.6902],
+        },
+        {
+            "type": "image",
+            "path": "books/1/images/a_w640.webp",
+            "variants": [{"width": 640, "path": "books/1/images/a_w640.webp"}],
+            "bbox": [1.0, 2.0, 3.0, 4.0],
+            "mask": None,
+            "width": 640,
+            "height": 480,
+        },
+        {
+            "type": "text",
+            "content": "Вторая строка",
+            "size": 11.00432,
+            "flags": 4,
+            "bidi": 0,
+            "char_flags": 16,
+            "color": 0,
+            "alpha": 255,
+            "ascender": 0.891,
+            "descender": -0.216,
+            "origin": [56.692913, 95.1],
+            "bbox": [56.692913, 85.3, 140.5, 97.5],
+        },
+    ]
+    compact = PageContentCodec.encode(items)
+    # у строк с одинаковым стилем общая запись в таблице стилей
+    assert compact["styles"] == [[11.0, 4, 0, 16, 0, 255, 0.89, -0.22]]
+    assert compact["lines"]["style"] == [0, 0]
+    assert compact["images"][0]["at"] == 1
+
+    decoded = PageContentCodec.decode(compact)
+    assert [item["type"] for item in decoded] == ["text", "image", "text"]
+    assert decoded[0]["content"] == "Первая строка"
+    assert decoded[0]["origin"] == [56.69, 81.27]
+    assert decoded[2]["bbox"] == [56.69, 85.3, 140.5, 97.5]
+    assert decoded[1] == items[1]
+    # старый формат отдается как есть
+    assert PageContentCodec.decode(items) is items
+
+
+def test_compact_content_is_smaller():
+    with fitz.open(PDF_PATH) as doc:
+        _, pages = PDFRenderer.parse_images_and_text_from_pdf(doc, book_id=1)
+    for page in pages:
+        items = PageContentCodec.decode(page.content)
+        assert PageContentCodec.encode(items) == page.content
+        assert len(orjson.dumps(page.content)) < len(orjson.dumps(items))
+
+
+def test_page_copy_rows():
+    pages = [
+        {
+            "book_id": 1,
+            "page_number": 1,
+            "content": {"lines": {"text": ['C:\\path\t"x"\n']}},
+            "content_hash": None,
+        },
+        {"book_id": 1, "page_number": 2, "content": [], "content_hash": "abc"},
+    ]
+    rows = page_copy_rows(pages).split("\n")
+    assert rows[-1] == ""
+    # в строке ровно 4 колонки, обратный слеш экранирован для COPY
+    book_id, page_number, content, content_hash = rows[0].split("\t")
+    assert (book_id, page_number, content_hash) == ("1", "1", "\\N")
+    assert orjson.loads(content.replace("\\\\", "\\")) == pages[0]["content"]
+    assert rows[1] == "1\t2\t[]\tabc"
+
+    # разделители в текстовых значениях не ломают строку
+    row = page_copy_rows(
+        [{"book_id": 1, "page_number": 3, "content": [], "content_hash": "a\tb\nc\r\\"}]
+    )
+    assert row == "1\t3\t[]\ta\\tb\\nc\\r\\\\\n"
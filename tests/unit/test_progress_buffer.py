@@ -0,0 +1,43 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from src.utils.progress_buffer import ReadingProgressBuffer
+
+
+class FakeUserReads:
+    def __init__(self):
+        self.batches = []
+
+    async def upsert_progress(self, rows):
+        await asyncio.sleep(0.01)
+        self.batches.append(rows)
+        return []
+
+
+class FakeDB:
+    def __init__(self):
+        self.user_reads = FakeUserReads()
+
+    async def commit(self): ...
+
+
+async def test_overflow_schedules_one_flush():
+    fake_db = FakeDB()
+
+    @asynccontextmanager
+    async def db_factory():
+        yield fake_db
+
+    buffer = ReadingProgressBuffer(
+        flush_interval_ms=60_000, max_entries=2, db_factory=db_factory
+    )
+    for user_id in range(10):
+        buffer.add(user_id=user_id, book_id=1, page_number=1)
+    # пока сброс не завершился, новые задачи не создаются
+    flush_task = buffer._background_flush
+    buffer.add(user_id=10, book_id=1, page_number=1)
+    assert buffer._background_flush is flush_task
+
+    await buffer.stop()
+    # все записи ушли одной пачкой
+    assert [len(batch) for batch in fake_db.user_reads.batches] == [11]
@@ -1,4 +1,8 @@
+import io
+import os
+from fastapi import UploadFile
 from src.config import settings
+from src.repositories.s3.base import PresignedUrlCache
 from tests.utils import FileManager
 
 
@@ -53,3 +57,58 @@ async def test_del_by_prefix(check_content_for_tests, s3):
     await s3.books.delete_bulk(*files_with_target_prefix)
     files_after_deletion = await s3.books.list_objects_by_prefix(prefix=target_prefix)
     assert not files_after_deletion
+
+
+async def test_get_bulk(check_content_for_tests, s3):
+    all_files_in_other = await FileManager().get_files_in_folder("other")
+    target_prefix = "files_to_get"
+
+    keys = []
+    for file, filename in all_files_in_other:
+        await s3.client.put_object(
+            Bucket=settings.S3_BUCKET_NAME, Key=f"{target_prefix}/{filename}", Body=file
+        )
+        keys.append(f"{target_prefix}/{filename}")
+    # файлы скачиваются параллельно, но порядок совпадает с порядком ключей
+    files = await s3.books.get_bulk(False, *keys)
+    assert [file["key"] for file in files] == keys
+    assert [file["content"] for file in files] == [
+        file for file, _ in all_files_in_other
+    ]
+    await s3.books.delete_bulk(*keys)
+
+
+async def test_upload_multipart_and_iter_file(s3):
+    part_size = 5 * 1024 * 1024  # минимальный размер части в S3
+    content = os.urandom(part_size * 2 + 1024)
+    key = "files_to_upload/multipart.bin"
+
+    await s3.books.upload_multipart(
+        file=UploadFile(io.BytesIO(content)), s3_path=key, part_size=part_size
+    )
+    chunks = [
+        chunk async for chunk in s3.books.iter_file_by_path(key, chunk_size=1024**2)
+    ]
+    assert max(len(chunk) for chunk in chunks) <= 1024**2
+    assert b"".join(chunks) == content
+
+    # маленький файл загружается одним запросом
+    await s3.books.upload_multipart(file=UploadFile(io.BytesIO(b"small")), s3_path=key)
+    assert await s3.books.get_file_by_path(key) == b"small"
+    await s3.books.delete_by_path(key)
+
+
+def test_presigned_url_cache():
+    urls = PresignedUrlCache(max_entries=2)
+    urls.set(("bucket", "a.png", 3600), "url_a", expires_in=3600)
+    assert urls.get(("bucket", "a.png", 3600)) == "url_a"
+    # для другого срока действия ссылка подписывается заново
+    assert urls.get(("bucket", "a.png", 60)) is None
+
+    # ссылку, у которой прошла половина срока, уже не отдаем
+    urls.set(("bucket", "b.png", 0), "url_b", expires_in=0)
+    assert urls.get(("bucket", "b.png", 0)) is None
+
+    urls.set(("bucket", "c.png", 3600), "url_c", expires_in=3600)
+    urls.set(("bucket", "d.png", 3600), "url_d", expires_in=3600)
+    assert urls.get(("bucket", "a.png", 3600)) is None